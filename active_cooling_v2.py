@@ -11,6 +11,8 @@ from psychrolib import (
     GetRelHumFromHumRatio,
     GetTDryBulbFromEnthalpyAndHumRatio
 )
+import psychrometrics_v1 as pv
+from helpers_v3 import weighted_percentile, row_hours
 
 SetUnitSystem(SI)
 
@@ -149,6 +151,7 @@ def build_hourly_padwall_activecool_df_TWO_OPTIONS(
 
         rows.append({
             "timestamp": r["timestamp"],
+            "interval_h": r.get("Interval (h)", 1.0),
             "T_out_C": t_out,
             "RH_out_pct": rh_out,
             "Solar_W_m2": r["Solar Radiation (W/m²)"],
@@ -176,6 +179,119 @@ def build_hourly_padwall_activecool_df_TWO_OPTIONS(
     return pd.DataFrame(rows)
 
 
+def padwall_activecool_arrays(
+    t_out,
+    rh_out,
+    t_set,
+    rh_set,
+    rh_cap,
+    t_max,
+    airflow_m3_h: float = 18000.0,
+    area_m2: float = 200.0
+) -> dict:
+    """
+    Array version of build_hourly_padwall_activecool_df_TWO_OPTIONS.
+
+    Inputs are scalars or NumPy arrays of any broadcastable shape (e.g. shift x hour), outputs are arrays of the
+    broadcast shape keyed by the same names as the builder's columns. Hours the builder would skip (any NaN input) are NaN.
+
+    Same results as the builder, including sub-zero pad wall runs and saturated air:
+
+    >>> t, rh, tmax = (g.ravel() for g in np.meshgrid([-20, -5, -0.5, 0, 8, 27, 35, 48], [5, 40, 85, 99, 100], [-10, 27]))
+    >>> weather = pd.DataFrame({
+    ...     "timestamp": pd.date_range("2001-01-01", periods=t.size, freq="h"), "Temperature (C)": t,
+    ...     "Relative Humidity (%)": rh, "Solar Radiation (W/m²)": 0.0, "T_set_C": 22.0, "RH_set_pct": 75.0,
+    ...     "RH_cap_pct": 90.0, "T_max_C": tmax,
+    ... })
+    >>> rows = build_hourly_padwall_activecool_df_TWO_OPTIONS(weather)
+    >>> arrays = padwall_activecool_arrays(t, rh, 22.0, 75.0, 90.0, tmax)
+    >>> max(float(np.max(np.abs(arrays[c] - rows[c]) / np.maximum(np.abs(rows[c]), 1.0))) for c in arrays) < 1e-9
+    True
+    """
+    p = 101325.0    # Atmospheric Pressure (Pa)
+
+    t_out, rh_out, t_set, rh_set, rh_cap, t_max = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (t_out, rh_out, t_set, rh_set, rh_cap, t_max))
+    )
+    valid = ~(np.isnan(t_out) | np.isnan(rh_out) | np.isnan(t_set) | np.isnan(rh_set) | np.isnan(rh_cap) | np.isnan(t_max))
+
+    # outdoor
+    W_out = pv.GetHumRatioFromRelHum(t_out, rh_out/100.0, p)
+    h_out = pv.GetMoistAirEnthalpy(t_out, W_out)
+
+    # padwall only runs when temperature exceeds Tmax, the wet bulb solve is limited to those hours
+    needs_cooling = valid & (t_out > t_max)
+
+    eta_used = np.zeros(t_out.shape)
+    W_pw = W_out.copy()
+    h_pw = h_out.copy()
+    T_pw = t_out.copy()
+    RH_pw = rh_out.copy()
+
+    if needs_cooling.any():
+        t_in = t_out[needs_cooling]
+        rh_in = rh_out[needs_cooling] / 100.0
+        W_in = W_out[needs_cooling]
+        h_in = h_out[needs_cooling]
+
+        t_wb = pv.GetTWetBulbFromRelHum(t_in, rh_in, p)
+        W_sat_wb = pv.GetHumRatioFromRelHum(t_wb, 1.0, p)
+        h_sat_wb = pv.GetMoistAirEnthalpy(t_wb, W_sat_wb)
+
+        # Cap referenced at Tmax, same as padwall_limited_by_rh_cap(..., t_ref_for_cap=t_max)
+        W_cap = pv.GetHumRatioFromRelHum(t_max[needs_cooling], rh_cap[needs_cooling] / 100.0, p)
+
+        denom_W = (W_sat_wb - W_in)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            eta_limit = (W_cap - W_in) / denom_W
+        eta_pw = np.where(denom_W <= 1e-12, 0.0, np.clip(np.minimum(eta, eta_limit), 0.0, eta))
+
+        W_pw_in = W_in + eta_pw * (W_sat_wb - W_in)
+        h_pw_in = h_in + eta_pw * (h_sat_wb - h_in)
+        T_pw_in = pv.GetTDryBulbFromEnthalpyAndHumRatio(h_pw_in, W_pw_in)
+
+        eta_used[needs_cooling] = eta_pw
+        W_pw[needs_cooling] = W_pw_in
+        h_pw[needs_cooling] = h_pw_in
+        T_pw[needs_cooling] = T_pw_in
+        RH_pw[needs_cooling] = pv.GetRelHumFromHumRatio(T_pw_in, W_pw_in, p) * 100.0
+
+    # Option 1: strict setpoint
+    W_set = pv.GetHumRatioFromRelHum(t_set, rh_set/100.0, p)
+    h_set = pv.GetMoistAirEnthalpy(t_set, W_set)
+    active1_J_kg = np.maximum(0.0, h_pw - h_set)
+
+    # Option 2: Tmax-only (cool to Tmax at current moisture)
+    h_tmax_sameW = pv.GetMoistAirEnthalpy(t_max, W_pw)
+    active2_J_kg = np.maximum(0.0, h_pw - h_tmax_sameW)
+
+    # Same as m3h_to_mdot_dryair_kg_s, the outdoor W is reused for the density
+    rho_moist = pv.GetMoistAirDensity(t_out, W_out, p)
+    mdot_da = np.where(np.asarray(airflow_m3_h) > 0, rho_moist * np.asarray(airflow_m3_h) / 3600.0 / (1.0 + W_out), 0.0)
+
+    Q1 = (mdot_da * active1_J_kg) / area_m2
+    Q2 = (mdot_da * active2_J_kg) / area_m2
+
+    out = {
+        "eta_used": eta_used,
+        "T_pw_C": T_pw,
+        "RH_pw_pct": RH_pw,
+        "h_out_J_kgDA": h_out,
+        "h_pw_J_kgDA": h_pw,
+        "h_set_J_kgDA": h_set,
+        "h_tmax_sameW_J_kgDA": h_tmax_sameW,
+        "active_J_kg_strict_setpoint": active1_J_kg,
+        "active_J_kg_Tmax": active2_J_kg,
+        "m_dot_dryair_kg_s": mdot_da,
+        "Q_active_W_m2_strict_setpoint": Q1,
+        "Q_active_W_m2_Tmax": Q2
+    }
+    for key in out:
+        out[key] = np.where(valid, out[key], np.nan)
+
+    return out
+
+
 def cooling_load_percentile_summary(
     df_output: pd.DataFrame,
     area_m2: float,
@@ -190,7 +306,11 @@ def cooling_load_percentile_summary(
         raise KeyError(f"'{load_col}' not found in df_output columns: {list(df_output.columns)}")
 
     # Extracts all values as a numpy array of floats, dropping all missing values
-    vals = df_output[load_col].dropna().to_numpy(dtype=float)
+    valid = df_output[load_col].notna()
+    vals = df_output.loc[valid, load_col].to_numpy(dtype=float)
+
+    hours = row_hours(df_output)[valid.to_numpy()]
+
     if vals.size == 0:
         return {}, f"--- {label} ---\nNo valid values found in '{load_col}'."
 
@@ -199,7 +319,7 @@ def cooling_load_percentile_summary(
     # For each percentile (85, 90, 92.5, 95 and 98) compute the cooling requirement in W/m2, then convert to kW
     for p in percentiles:
         # Percentile of W/m²
-        w_m2 = float(np.percentile(vals, p))
+        w_m2 = float(weighted_percentile(vals, hours, p))
 
         # enthalpy kW (W/m² * area / 1000)
         cooling_kw = (w_m2 * area_m2) / 1000.0
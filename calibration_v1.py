@@ -0,0 +1,215 @@
+"""
+
+This script calibrates the heating model against measured heating energy of an existing greenhouse
+
+The heat loss parameters (cladd, u_leak, u_roof and the screen efficiencies) are fitted by least squares
+(Levenberg-Marquardt) to measured hourly or monthly energy. Every model evaluation in a fit is batched:
+the base point, the finite-difference Jacobian and the trial steps of an iteration are one (parameter set x hour)
+array evaluation of heating_v1.heating_load_W_m2, aggregated to the measured periods in one bincount.
+
+The model only sees a day and a night heat loss coefficient. cladd, u_roof and scr1_eff only enter as their product, so
+at most two parameters can be fitted together: one of those three with u_leak or scr2_eff, or u_leak with scr2_eff. Other
+sets are flagged as not identifiable. The active cooling model has no envelope parameters, so chiller energy is not used here.
+
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import heating_v1
+from helpers_v3 import row_hours
+
+# Fittable parameters with their bounds, in the order of the parameter vector
+FIT_PARAMETERS = {
+    "cladd": (0.5, 3.0),
+    "u_leak": (0.0, 10.0),
+    "u_roof": (0.0, 20.0),
+    "scr1_eff": (0.0, 100.0),
+    "scr2_eff": (0.0, 100.0),
+}
+
+MAX_CONDITION = 1e10     # Above this (scaled) condition number the fitted parameters cannot be told apart
+
+MEASUREMENT_INTERVALS = {
+    "Hourly": "h",
+    "Monthly": "MS",
+}
+
+
+def period_start(timestamps: pd.Series, freq: str) -> pd.Series:
+    """
+    Start of the measurement period (hour or month) each timestamp falls in.
+    """
+    if freq == "MS":
+        return timestamps.dt.to_period("M").dt.start_time
+    return timestamps.dt.floor(freq)
+
+
+def _align(df_weather: pd.DataFrame, measured: pd.DataFrame, energy_col: str, freq: str, heating_target: str):
+    # Weather rows inside a measured period, their period number and the measured energy per period
+    measured_ts = pd.to_datetime(measured["Local Time"])
+    y = pd.to_numeric(measured[energy_col], errors="coerce").groupby(period_start(measured_ts, freq)).sum(min_count=1).dropna()
+
+    keys = period_start(df_weather["timestamp"], freq)
+    valid = df_weather["Temperature (C)"].notna() & df_weather[heating_target].notna()
+    rows = np.flatnonzero((keys.isin(y.index) & valid).to_numpy())
+    if rows.size == 0:
+        raise ValueError("The measured energy does not overlap the weather data.")
+
+    codes, periods = pd.factorize(keys.iloc[rows], sort=True)
+
+    return rows, codes, periods, y.loc[periods].to_numpy(dtype=float)
+
+
+def calibrate_heating(
+    df_weather: pd.DataFrame,
+    measured: pd.DataFrame,
+    total_area_m2: float,
+    fit=("u_leak", "u_roof"),
+    initial: dict = None,
+    heating_target: str = "T_set_C",
+    energy_col: str = "Heating Energy (MWh)",
+    freq: str = "h",
+    max_iter: int = 100,
+    confidence: float = 0.95
+):
+    """
+    Fit the heating parameters in fit to measured heating energy (MWh per period), the others stay at initial.
+
+    measured needs "Local Time" and energy_col. freq is the measurement period ("h" or "MS"), measured rows inside
+    one period are summed. total_area_m2 is the heated floor area (area per AHU x AHU count).
+
+    Returns (fit_results, fit_stats, comparison):
+    fit_results per parameter: initial and fitted value, standard error and confidence interval;
+    fit_stats: goodness of fit (RMSE, CV(RMSE), NMBE, R²), whether the parameters are identifiable, iterations,
+    model evaluations and parameter correlations;
+    comparison per period: measured, initial model and calibrated model energy.
+    """
+    unknown = [name for name in fit if name not in FIT_PARAMETERS]
+    if unknown:
+        raise ValueError(f"Cannot fit parameters: {unknown}")
+    if not fit:
+        raise ValueError("Select at least one parameter to fit.")
+
+    start = {"cladd": 1.2, "u_leak": 0.7, "u_roof": 6.9, "scr1_eff": 47, "scr2_eff": 50}
+    start.update(initial or {})
+
+    rows, codes, periods, y = _align(df_weather, measured, energy_col, freq, heating_target)
+    n_periods = len(periods)
+
+    t_out = df_weather["Temperature (C)"].to_numpy(dtype=float)[rows][None, :]
+    is_day = df_weather["is_day"].to_numpy()[rows][None, :]
+    t_target = df_weather[heating_target].to_numpy(dtype=float)[rows][None, :]
+    hours = row_hours(df_weather)[rows]
+    W_m2_to_MWh = total_area_m2 * hours / 1e6
+
+    i_fit = [list(FIT_PARAMETERS).index(name) for name in fit]
+    lower = np.array([FIT_PARAMETERS[name][0] for name in fit])
+    upper = np.array([FIT_PARAMETERS[name][1] for name in fit])
+    base = np.array([float(start[name]) for name in FIT_PARAMETERS])
+
+    n_evaluations = 0
+
+    def evaluate(thetas):
+        # (K x n_fit) parameter sets -> (K x period) modelled energy, one batched model call
+        nonlocal n_evaluations
+        params = np.tile(base, (len(thetas), 1))
+        params[:, i_fit] = thetas
+        cladd, u_leak, u_roof, scr1_eff, scr2_eff = (params[:, [j]] for j in range(len(FIT_PARAMETERS)))
+
+        Q = heating_v1.heating_load_W_m2(t_out, is_day, t_target, scr1_eff, scr2_eff, cladd, u_leak, u_roof)
+        energy = Q * W_m2_to_MWh
+        k = np.repeat(np.arange(len(thetas)), rows.size)
+        n_evaluations += len(thetas)
+
+        return np.bincount(
+            k * n_periods + np.tile(codes, len(thetas)), weights=energy.ravel(), minlength=len(thetas) * n_periods
+        ).reshape(len(thetas), n_periods)
+
+    def jacobian(theta):
+        # Base point and forward differences in one batch
+        steps = 1e-4 * np.maximum(np.abs(theta), 1.0)
+        steps = np.where(theta + steps > upper, -steps, steps)
+        batch = np.vstack([theta, theta + np.diag(steps)])
+        f = evaluate(batch)
+        return f[0], ((f[1:] - f[0]) / steps[:, None]).T
+
+    theta = np.clip(base[i_fit], lower, upper)
+    f, J = jacobian(theta)
+    rss = np.sum((y - f) ** 2)
+    lam = 1e-3
+    damping = np.array([0.1, 1.0, 10.0])
+
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        A = J.T @ J
+        g = J.T @ (y - f)
+        scale = np.diag(A) + 1e-12
+
+        # Levenberg-Marquardt steps for a few damping factors, evaluated together
+        candidates = np.array([
+            np.clip(theta + np.linalg.solve(A + l * np.diag(scale), g), lower, upper)
+            for l in lam * damping
+        ])
+        f_candidates = evaluate(candidates)
+        rss_candidates = np.sum((y - f_candidates) ** 2, axis=1)
+        best = int(np.argmin(rss_candidates))
+
+        if rss_candidates[best] < rss:
+            step = candidates[best] - theta
+            improvement = (rss - rss_candidates[best]) / max(rss, 1e-300)
+            theta = candidates[best]
+            lam = max(lam * damping[best], 1e-12)
+            f, J = jacobian(theta)
+            rss = np.sum((y - f) ** 2)
+            if improvement < 1e-12 or np.all(np.abs(step) <= 1e-9 * np.maximum(np.abs(theta), 1.0)):
+                break
+        else:
+            lam *= 100.0
+            if lam > 1e12:
+                break
+
+    # Uncertainty from the Jacobian at the solution. The data only pins down the day and night loss coefficients, so
+    # more than two free parameters, or two of cladd / u_roof / scr1_eff, are not identifiable and get no standard errors
+    dof = n_periods - len(fit)
+    s2 = rss / dof if dof > 0 else np.nan
+    A = J.T @ J
+    norm = np.sqrt(np.diag(A)) + 1e-300
+    identifiable = bool(np.linalg.cond(A / np.outer(norm, norm)) < MAX_CONDITION)
+    covariance = s2 * np.linalg.pinv(A)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.outer(np.sqrt(np.diag(covariance)), np.sqrt(np.diag(covariance)))
+    std_error = np.sqrt(np.clip(np.diag(covariance), 0.0, None)) if identifiable else np.full(len(fit), np.nan)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    fit_results = pd.DataFrame({
+        "Initial": base[i_fit],
+        "Fitted": theta,
+        "Std Error": std_error,
+        f"CI Low ({confidence:.0%})": theta - z * std_error,
+        f"CI High ({confidence:.0%})": theta + z * std_error,
+    }, index=pd.Index(list(fit), name="Parameter"))
+
+    f_initial = evaluate(base[i_fit][None, :])[0]
+    residual = y - f
+    fit_stats = {
+        "periods": n_periods,
+        "identifiable": identifiable,
+        "iterations": iterations,
+        "model_evaluations": n_evaluations,
+        "RMSE (MWh)": float(np.sqrt(np.mean(residual ** 2))),
+        "CV(RMSE) (%)": float(np.sqrt(np.mean(residual ** 2)) / np.mean(y) * 100) if np.mean(y) else np.nan,
+        "NMBE (%)": float(np.sum(residual) / (n_periods * np.mean(y)) * 100) if np.mean(y) else np.nan,
+        "R2": float(1 - rss / np.sum((y - y.mean()) ** 2)) if n_periods > 1 and np.any(y != y.mean()) else np.nan,
+        "correlation": pd.DataFrame(correlation, index=list(fit), columns=list(fit)),
+    }
+
+    comparison = pd.DataFrame({
+        "Measured (MWh)": y,
+        "Initial Model (MWh)": f_initial,
+        "Calibrated Model (MWh)": f,
+    }, index=pd.Index(periods, name="Period"))
+
+    return fit_results, fit_stats, comparison
@@ -0,0 +1,150 @@
+"""
+If the user selects "Campus" in the side bar, the multi-block campus calculator will be displayed
+"""
+
+import streamlit as st
+import pandas as pd
+
+from helpers_v3 import prepare_weather_df, call_cropData, airflowrate_perAHU_m3h
+from weather_resample_v1 import RESOLUTION_OPTIONS
+import campus_v1
+import pool_ui_v1
+import heating_v1
+
+
+def block_configs(blocks_df: pd.DataFrame) -> list:
+    """
+    Campus block configs from the editor table: crop setpoints from the crop database, AHU and area from the layout.
+    """
+    crops = {}
+    blocks = []
+    for _, r in blocks_df.iterrows():
+        if r["Crop"] not in crops:
+            crops[r["Crop"]] = call_cropData(r["Crop"])
+        (reference, variety, day_min_temp, day_max_temp, night_min_temp, night_max_temp, day_min_rh, day_max_rh,
+         night_min_rh, night_max_rh, day_opt_temp, night_opt_temp, day_opt_rh, night_opt_rh) = crops[r["Crop"]]
+
+        AHU_count_pertruss = int(r["AHUs per Truss"])
+        _, airflow_m3_h = airflowrate_perAHU_m3h(r["Truss Length (mm)"], r["Trolley"], AHU_count_pertruss)
+
+        blocks.append({
+            "name": r["Block"],
+            "t_day": day_opt_temp,
+            "t_night": night_opt_temp,
+            "rh_day": day_opt_rh,
+            "rh_night": night_opt_rh,
+            "rh_cap_day": day_max_rh,
+            "rh_cap_night": night_max_rh,
+            "tmax_day": day_max_temp,
+            "tmax_night": night_max_temp,
+            "tmin_day": day_min_temp,
+            "tmin_night": night_min_temp,
+            "area_m2": r["Truss Length (mm)"] / 1000 / AHU_count_pertruss * r["Air Tube Length (m)"],
+            "AHU_count": AHU_count_pertruss * int(r["Truss Count"]),
+            "airflow_m3_h": airflow_m3_h,
+            "scr1_eff": r["Screen 1 Eff (%)"],
+            "scr2_eff": r["Screen 2 Eff (%)"],
+        })
+
+    return blocks
+
+
+def render(crop_list):
+    st.title("Campus Aggregation")
+    st.markdown(
+        "Several greenhouse blocks sharing one heating plant, chiller plant and heat storage tank. "
+        "The plant is sized on the coincident load of all blocks, hour by hour, not on the sum of each block's own percentile."
+    )
+
+    st.header("Upload Climate Data")
+    weather_upload = st.file_uploader("Upload weather Excel from ksgclimatedata.streamlit.app", type=["xlsx"], key="campus_weather")
+    resolution_label = st.selectbox("Model Time Resolution", list(RESOLUTION_OPTIONS), key="campus_resolution")
+
+    st.header("Greenhouse Blocks")
+    st.markdown("*Setpoints for each block come from the crop database (optimal values, max RH as the RH cap).*")
+    default_blocks = pd.DataFrame([{
+        "Block": "Block 1",
+        "Crop": crop_list[0],
+        "Truss Count": 10,
+        "AHUs per Truss": 2,
+        "Truss Length (mm)": 9600,
+        "Air Tube Length (m)": 110,
+        "Trolley": "No trolley",
+        "Screen 1 Eff (%)": 47,
+        "Screen 2 Eff (%)": 50,
+    }])
+    blocks_df = st.data_editor(
+        default_blocks,
+        num_rows="dynamic",
+        column_config={
+            "Crop": st.column_config.SelectboxColumn(options=crop_list, required=True),
+            "Trolley": st.column_config.SelectboxColumn(options=["No trolley", "Standard (771mm)"], required=True),
+            "Truss Count": st.column_config.NumberColumn(min_value=1, step=1, required=True),
+            "AHUs per Truss": st.column_config.NumberColumn(min_value=1, step=1, required=True),
+            "Screen 1 Eff (%)": st.column_config.NumberColumn(min_value=0, max_value=100, step=1),
+            "Screen 2 Eff (%)": st.column_config.NumberColumn(min_value=0, max_value=100, step=1),
+        },
+        key="campus_blocks"
+    )
+
+    with st.form("campusData", clear_on_submit=False):
+        st.subheader("Campus Parameters")
+        cladd = st.number_input("Cladd Ratio", None, None, 1.2)
+        u_leak = st.number_input("U_leak (W/m2/K)", None, None, 0.7)
+        u_roof = st.number_input("U_roof (W/m2/K)", None, None, 6.9)
+        cooling_method = st.selectbox("Active Cooling Load Method", ["Maximum Allowed Temperature and Unlimited RH", "True Temperature and RH Setpoints"])
+        heating_method = st.selectbox("Heating Load Method", ["True Setpoint", "Minimum Allowed Temperature"])
+        hours_of_heat_storage = st.number_input("Hours of Heat Storage", value=8, step=1)
+        peak_percentile = st.selectbox("Peak Demand Percentile", [98, 95, 92.5, 90, 85])
+
+        run = st.form_submit_button("Calculate Campus")
+
+    if run:
+        if weather_upload is None:
+            st.error("Upload a weather file first.")
+            return
+
+        blocks_df = blocks_df.dropna(how="all")
+        if blocks_df.empty or blocks_df.isna().any().any():
+            st.error("Fill in every column for each block.")
+            return
+
+        blocks = block_configs(blocks_df)
+
+        # Block setpoints are applied by the campus model, the weather only needs is_day from here
+        first = blocks[0]
+        weather_future = pool_ui_v1.pool_submit(
+            prepare_weather_df,
+            weather_upload.getvalue(),
+            first["t_day"], first["t_night"],
+            first["rh_day"], first["rh_night"],
+            first["rh_cap_day"], first["rh_cap_night"],
+            first["tmax_day"], first["tmax_night"],
+            first["tmin_day"], first["tmin_night"],
+            RESOLUTION_OPTIONS[resolution_label]
+        )
+        (weather_df, _, _), = pool_ui_v1.pool_results("Processing weather data...", [weather_future])
+
+        heating_target = "T_set_C" if heating_method == "True Setpoint" else "T_min_C"
+        if cooling_method == "True Temperature and RH Setpoints":
+            load_col = "Q_active_W_m2_strict_setpoint"
+        else:
+            load_col = "Q_active_W_m2_Tmax"
+
+        campus_results, block_results = campus_v1.campus_load_summary(
+            weather_df, blocks, heating_target, load_col, cladd, u_leak, u_roof
+        )
+        st.success(f"Campus model completed for {len(blocks)} blocks.")
+
+        st.subheader("Campus Load Percentile Summary")
+        st.caption("Diversity factor = sum of the block percentiles / coincident campus percentile.")
+        st.dataframe(campus_results)
+
+        demand_MW = campus_results.loc[peak_percentile, "Heating, Coincident (MW)"]
+        HST_volume_m3 = heating_v1.HST_volume(hours_of_heat_storage, demand_MW)
+        st.markdown(
+            f"**Recommended shared HST volume:** {HST_volume_m3:,.0f} m³ to store {hours_of_heat_storage} hours of heat."
+        )
+
+        st.subheader("Block Load Percentiles")
+        st.dataframe(block_results)
@@ -0,0 +1,137 @@
+"""
+
+This script contains the campus calculations: several greenhouse blocks sharing one heating plant, chiller plant and HST
+
+Each block has its own crop setpoints, area, AHU configuration and screens. All blocks are evaluated together as
+stacked (block x hour) arrays through the array versions of the heating and active cooling models, converted to W
+(W/m² x area per AHU x AHU count) and summed over the blocks hour by hour. The plant is sized on the percentiles of
+that coincident load, which is lower than the sum of each block's own percentile. The ratio of the two is the
+diversity factor.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+import active_cooling_v2
+import heating_v1
+from helpers_v3 import weighted_percentile, row_hours
+
+# Block config keys, one dict per block. Setpoints are day/night pairs like prepare_weather_df
+BLOCK_KEYS = [
+    "name",
+    "t_day", "t_night",
+    "rh_day", "rh_night",
+    "rh_cap_day", "rh_cap_night",
+    "tmax_day", "tmax_night",
+    "tmin_day", "tmin_night",
+    "area_m2",              # Area per AHU
+    "AHU_count",
+    "airflow_m3_h",         # Airflow per AHU
+    "scr1_eff", "scr2_eff",
+]
+
+
+def _block_column(blocks: list, key: str) -> np.ndarray:
+    # One value per block as an (N x 1) column, broadcasts against (1 x hour) weather rows
+    return np.array([float(b[key]) for b in blocks])[:, None]
+
+
+def campus_hourly_loads_W(
+    df_weather: pd.DataFrame,
+    blocks: list,
+    heating_target: str = "T_set_C",
+    load_col: str = "Q_active_W_m2_Tmax",
+    cladd: float = 1.2,
+    u_leak: float = 0.7,
+    u_roof: float = 6.9
+):
+    """
+    Hourly heating and active cooling load of every block in W, as two (block x hour) arrays.
+    Hours a builder would skip are NaN.
+    """
+    missing = [k for b in blocks for k in BLOCK_KEYS if k not in b]
+    if missing:
+        raise ValueError(f"Missing block config keys: {sorted(set(missing))}")
+
+    t_out = df_weather["Temperature (C)"].to_numpy(dtype=float)[None, :]
+    rh_out = df_weather["Relative Humidity (%)"].to_numpy(dtype=float)[None, :]
+    is_day = df_weather["is_day"].to_numpy()[None, :] == 1
+
+    def day_night(day_key, night_key):
+        return np.where(is_day, _block_column(blocks, day_key), _block_column(blocks, night_key))
+
+    t_set = day_night("t_day", "t_night")
+    rh_set = day_night("rh_day", "rh_night")
+    rh_cap = day_night("rh_cap_day", "rh_cap_night")
+    t_max = day_night("tmax_day", "tmax_night")
+    t_target = t_set if heating_target == "T_set_C" else day_night("tmin_day", "tmin_night")
+
+    area_m2 = _block_column(blocks, "area_m2")
+    block_area_m2 = area_m2 * _block_column(blocks, "AHU_count")
+
+    Q_heat = heating_v1.heating_load_W_m2(
+        t_out, is_day.astype(int), t_target,
+        _block_column(blocks, "scr1_eff"), _block_column(blocks, "scr2_eff"),
+        cladd, u_leak, u_roof
+    )
+    cooling = active_cooling_v2.padwall_activecool_arrays(
+        t_out, rh_out, t_set, rh_set, rh_cap, t_max, _block_column(blocks, "airflow_m3_h"), area_m2
+    )
+
+    return Q_heat * block_area_m2, cooling[load_col] * block_area_m2
+
+
+def campus_load_summary(
+    df_weather: pd.DataFrame,
+    blocks: list,
+    heating_target: str = "T_set_C",
+    load_col: str = "Q_active_W_m2_Tmax",
+    cladd: float = 1.2,
+    u_leak: float = 0.7,
+    u_roof: float = 6.9,
+    percentiles=(98, 95, 92.5, 90, 85)
+):
+    """
+    Coincident-peak percentiles of the campus and the diversity factor.
+
+    Returns (campus_results, block_results):
+    campus_results has one row per percentile with the sum of the block percentiles, the coincident percentile
+    of the summed load and the diversity factor (sum / coincident) for heating and cooling, in MW.
+    block_results has each block's own percentiles in MW, indexed by (Block, Percentile).
+    """
+    heat_W, cool_W = campus_hourly_loads_W(df_weather, blocks, heating_target, load_col, cladd, u_leak, u_roof)
+
+    hours = row_hours(df_weather)
+
+    campus = {}
+    per_block = {}
+    for label, loads_W in (("Heating", heat_W), ("Cooling", cool_W)):
+        # An hour counts for the campus only if every block has a load for it
+        valid = ~np.isnan(loads_W).any(axis=0)
+        loads_MW = loads_W[:, valid] / 1e6
+        hours_valid = hours[valid]
+
+        if loads_MW.shape[1] == 0:
+            block_pct = np.full((len(blocks), len(percentiles)), np.nan)
+            coincident = np.full(len(percentiles), np.nan)
+        else:
+            block_pct = np.vstack([weighted_percentile(row, hours_valid, percentiles) for row in loads_MW])
+            coincident = weighted_percentile(loads_MW.sum(axis=0), hours_valid, percentiles)
+
+        non_coincident = block_pct.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            diversity = np.where(coincident > 0, non_coincident / coincident, np.nan)
+
+        campus[f"{label}, Sum of Blocks (MW)"] = non_coincident
+        campus[f"{label}, Coincident (MW)"] = coincident
+        campus[f"{label} Diversity Factor"] = diversity
+        per_block[f"Total {label} (MW)"] = block_pct.ravel()
+
+    campus_results = pd.DataFrame(campus, index=list(percentiles))
+    block_index = pd.MultiIndex.from_product(
+        [[b["name"] for b in blocks], list(percentiles)], names=["Block", "Percentile"]
+    )
+    block_results = pd.DataFrame(per_block, index=block_index)
+
+    return campus_results, block_results
@@ -0,0 +1,186 @@
+"""
+
+This script contains the hourly load charts shown on the Calculator page: load time-series and load-duration curves
+
+A year of hourly data is 8760+ points per series, so each series is downsampled on the server before it is sent to the browser.
+Zooming into a date range re-samples only that window, so the detail shown increases as the range gets shorter.
+
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+MAX_POINTS = 1500   # Points sent to the browser per series
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of the n_out points that best preserve the visual shape of (x, y).
+    The first and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket edges for the n - 2 interior points
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+    edges[-1] = n - 1
+
+    # Average point of each bucket, used as the third corner of the triangle
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs(
+            (x[a] - avg_x[i]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max bucketing: keeps the minimum and maximum of n_out / 2 equal buckets, so every peak survives.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    # Pad to a whole number of buckets so the search is a single reshape
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+
+    valid = ~np.all(np.isnan(buckets), axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    i_min = offsets + np.nanargmin(buckets[valid], axis=1)
+    i_max = offsets + np.nanargmax(buckets[valid], axis=1)
+
+    return np.unique(np.concatenate([[0, n - 1], i_min, i_max]))
+
+
+def downsample_series(
+    series: pd.Series,
+    n_out: int = MAX_POINTS,
+    method: str = "lttb"
+) -> pd.Series:
+    """
+    Downsample a numeric series (index = timestamp or position) to at most about n_out points.
+    """
+    series = series.dropna()
+    if len(series) <= n_out:
+        return series
+
+    if method == "lttb":
+        index = series.index
+        if isinstance(index, pd.DatetimeIndex):
+            x = index.asi8.astype(float)
+        else:
+            x = np.asarray(index, dtype=float)
+        keep = lttb_indices(x, series.to_numpy(dtype=float), n_out)
+    elif method == "minmax":
+        keep = minmax_indices(series.to_numpy(dtype=float), n_out)
+    else:
+        raise ValueError(f"Unknown downsampling method: '{method}'")
+
+    return series.iloc[keep]
+
+
+def load_duration_curve(series: pd.Series, n_out: int = MAX_POINTS) -> pd.Series:
+    """
+    Load-duration curve: loads sorted high to low against the percent of hours they are exceeded.
+    """
+    vals = np.sort(series.dropna().to_numpy(dtype=float))[::-1]
+    if vals.size == 0:
+        return pd.Series(dtype=float)
+
+    pct_hours = np.arange(vals.size) / vals.size * 100.0
+    curve = pd.Series(vals, index=pct_hours)
+
+    return downsample_series(curve, n_out, method="lttb")
+
+
+def long_format(curves: dict, x_name: str, y_name: str) -> pd.DataFrame:
+    # One row per point, so series of different lengths share the same chart
+    frames = []
+    for label, curve in curves.items():
+        frames.append(pd.DataFrame({x_name: curve.index, y_name: curve.to_numpy(), "Series": label}))
+    if not frames:
+        return pd.DataFrame(columns=[x_name, y_name, "Series"])
+    return pd.concat(frames, ignore_index=True)
+
+
+@st.fragment
+def render_load_charts(series: dict, method: str = "lttb"):
+    """
+    Hourly load time-series and load-duration curves for each {label: W/m² series indexed by timestamp}.
+    Runs as a fragment, so moving the zoom slider only re-samples the charts and not the whole page.
+    """
+    series = {label: s.dropna().sort_index() for label, s in series.items() if s.notna().any()}
+    if not series:
+        st.info("No hourly loads to chart.")
+        return
+
+    st.subheader("Hourly Loads")
+
+    t_first = min(s.index[0] for s in series.values()).to_pydatetime()
+    t_last = max(s.index[-1] for s in series.values()).to_pydatetime()
+
+    if t_last > t_first:
+        t_start, t_end = st.slider(
+            "Zoom to date range",
+            min_value=t_first,
+            max_value=t_last,
+            value=(t_first, t_last),
+            step=timedelta(hours=1),
+            format="YYYY-MM-DD HH:mm",
+            key="load_chart_zoom"
+        )
+    else:
+        t_start, t_end = t_first, t_last
+
+    # Re-sample only the selected window, so a shorter range is shown at a higher resolution
+    shown, total = 0, 0
+    windows = {}
+    for label, s in series.items():
+        window = s.loc[t_start:t_end]
+        total += len(window)
+        windows[label] = downsample_series(window, MAX_POINTS, method)
+        shown += len(windows[label])
+
+    st.line_chart(
+        long_format(windows, "Time", "Load (W/m²)"),
+        x="Time",
+        y="Load (W/m²)",
+        color="Series"
+    )
+    st.caption(f"Showing {shown:,} of {total:,} hourly points. Narrow the date range to see more detail.")
+
+    st.subheader("Load-Duration Curves")
+    curves = {label: load_duration_curve(s) for label, s in series.items()}
+    st.line_chart(
+        long_format(curves, "Hours Exceeded (%)", "Load (W/m²)"),
+        x="Hours Exceeded (%)",
+        y="Load (W/m²)",
+        color="Series"
+    )
@@ -0,0 +1,110 @@
+"""
+
+This script contains the climate-shift ensemble used to future-proof designs
+
+Each variant is the uploaded weather year with a temperature offset (C) and an RH adjustment (% points) applied.
+All variants are evaluated together as (shift x hour) arrays through the array versions of the heating and
+active cooling models, so no per-variant DataFrame is built. Crop setpoints and day/night are not shifted.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+import active_cooling_v2
+import heating_v1
+from helpers_v3 import weighted_percentile, row_hours
+
+MAX_BLOCK_SIZE = 2_000_000      # Max (variant x hour) elements evaluated at once, bounds peak memory
+
+
+def shift_grid(t_min_C: float, t_max_C: float, t_step_C: float, rh_shifts_pct=(0.0,)):
+    """
+    Every combination of temperature shift (t_min_C to t_max_C in t_step_C steps) and RH adjustment.
+    Returns two flat arrays of equal length: (temperature shifts, RH shifts).
+    """
+    if t_step_C <= 0:
+        raise ValueError("Temperature shift step must be greater than 0.")
+
+    t_shifts = np.round(np.arange(t_min_C, t_max_C + t_step_C / 2, t_step_C), 6)
+    dT, dRH = np.meshgrid(t_shifts, np.asarray(rh_shifts_pct, dtype=float), indexing="ij")
+
+    return dT.ravel(), dRH.ravel()
+
+
+def climate_shift_ensemble(
+    df_weather: pd.DataFrame,
+    temp_shifts_C,
+    rh_shifts_pct,
+    scr1_eff: float,
+    scr2_eff: float,
+    heating_target: str = "T_set_C",
+    airflow_m3_h: float = 18000.0,
+    area_m2: float = 200.0,
+    AHU_count: float = 1,
+    cladd: float = 1.2,
+    u_leak: float = 0.7,
+    u_roof: float = 6.9,
+    percentiles=(98, 95, 92.5, 90, 85)
+) -> pd.DataFrame:
+    """
+    Design loads versus climate shift.
+
+    temp_shifts_C and rh_shifts_pct are paired, one entry per variant (see shift_grid). Shifted RH is clipped to 0-100%.
+    Returns one row per variant, indexed by (Temp Shift (C), RH Shift (%)), with (load, percentile) columns in MW.
+    """
+    dT = np.atleast_1d(np.asarray(temp_shifts_C, dtype=float))
+    dRH = np.broadcast_to(np.asarray(rh_shifts_pct, dtype=float), dT.shape)
+
+    # Prepared weather as (1 x hour) rows, shifted below to (variant x hour)
+    t_out = df_weather["Temperature (C)"].to_numpy(dtype=float)[None, :]
+    rh_out = df_weather["Relative Humidity (%)"].to_numpy(dtype=float)[None, :]
+    is_day = df_weather["is_day"].to_numpy()[None, :]
+    t_target = df_weather[heating_target].to_numpy(dtype=float)[None, :]
+    t_set = df_weather["T_set_C"].to_numpy(dtype=float)[None, :]
+    rh_set = df_weather["RH_set_pct"].to_numpy(dtype=float)[None, :]
+    rh_cap = df_weather["RH_cap_pct"].to_numpy(dtype=float)[None, :]
+    t_max = df_weather["T_max_C"].to_numpy(dtype=float)[None, :]
+
+    hours = row_hours(df_weather)
+    uniform_hours = np.all(hours == hours[0]) if hours.size else True
+
+    n_hours = t_out.shape[1]
+    block = max(1, MAX_BLOCK_SIZE // max(n_hours, 1))
+
+    loads = {
+        "Total Heating (MW)": np.empty((len(percentiles), dT.size)),
+        "Total Cooling, Setpoint (MW)": np.empty((len(percentiles), dT.size)),
+        "Total Cooling, Tmax (MW)": np.empty((len(percentiles), dT.size)),
+    }
+    W_m2_to_MW = area_m2 * AHU_count / 1e6
+
+    for start in range(0, dT.size, block):
+        stop = min(start + block, dT.size)
+        t_shifted = t_out + dT[start:stop, None]
+        rh_shifted = np.clip(rh_out + dRH[start:stop, None], 0.0, 100.0)
+
+        Q_heat = heating_v1.heating_load_W_m2(
+            t_shifted, is_day, t_target, scr1_eff, scr2_eff, cladd, u_leak, u_roof
+        )
+        cooling = active_cooling_v2.padwall_activecool_arrays(
+            t_shifted, rh_shifted, t_set, rh_set, rh_cap, t_max, airflow_m3_h, area_m2
+        )
+
+        # Skipped hours are NaN, the same rows the percentile summaries drop
+        for label, Q in (
+            ("Total Heating (MW)", Q_heat),
+            ("Total Cooling, Setpoint (MW)", cooling["Q_active_W_m2_strict_setpoint"]),
+            ("Total Cooling, Tmax (MW)", cooling["Q_active_W_m2_Tmax"]),
+        ):
+            if uniform_hours:
+                loads[label][:, start:stop] = np.nanpercentile(Q, percentiles, axis=1) * W_m2_to_MW
+            else:
+                for i, row in enumerate(Q):
+                    valid = ~np.isnan(row)
+                    loads[label][:, start + i] = weighted_percentile(row[valid], hours[valid], percentiles) * W_m2_to_MW
+
+    columns = pd.MultiIndex.from_product([list(loads), list(percentiles)], names=["Load", "Percentile"])
+    index = pd.MultiIndex.from_arrays([dT, np.asarray(dRH)], names=["Temp Shift (C)", "RH Shift (%)"])
+
+    return pd.DataFrame(np.vstack(list(loads.values())).T, index=index, columns=columns)
@@ -0,0 +1,246 @@
+"""
+
+This script contains the compute pool shared by every session of the app
+
+The heavy calculations (weather preparation and the row-by-row heating and active cooling builders) hold the GIL for
+seconds, so they run in worker processes instead of the session threads. Each session has its own queue and the
+workers take jobs from the sessions in turn, so one large multi-year upload cannot hold up everyone else. The queues
+are bounded: a job that does not fit is refused with PoolBusyError. A job identical to one already queued or running
+(same function and inputs) gets the same future instead of being computed twice. When a session stops or reruns,
+cancel_session drops its queued jobs that no other session is waiting for.
+
+Typical use:
+    future = submit(session_id, heating_v1.build_hourly_heating_df_TWO_OPTIONS, weather_df, 47, 50)
+    while not future.done(): show queue_position(future)
+    heating_df = future.result()
+
+"""
+
+import hashlib
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))     # Leave a core for the Streamlit server
+MAX_QUEUED_JOBS = 32            # Jobs waiting for a worker, all sessions together
+MAX_QUEUED_PER_SESSION = 4      # Jobs waiting for a worker, one session
+
+_lock = threading.Condition()
+_sessions = OrderedDict()       # session id -> deque of queued jobs, in the order the sessions get their turn
+_jobs = {}                      # job key -> job, for every queued or running job
+_running = set()                # keys of the jobs on a worker
+_executor = None
+_dispatcher = None
+
+# Main module while workers start: spawn re-runs sys.modules["__main__"] in every new worker, and under
+# `streamlit run` that is a stand-in for the app script. With this one the workers only import the job modules
+_WORKER_MAIN = types.ModuleType("__main__")
+
+
+class PoolBusyError(RuntimeError):
+    """
+    The queue is full and the job was not accepted, try again once the running jobs finish.
+    """
+
+
+def job_key(fn, args, kwargs) -> str:
+    """
+    Stable key for a job: hashes the function name and its inputs (DataFrame contents, bytes or repr of the rest).
+    """
+    digest = hashlib.sha256(f"{fn.__module__}.{fn.__qualname__}\n".encode())
+
+    for name, val in [(None, a) for a in args] + sorted(kwargs.items()):
+        digest.update(f"{name}|{type(val).__name__}|".encode())
+        if isinstance(val, pd.DataFrame):
+            digest.update(repr(list(val.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(val, index=True).to_numpy().tobytes())
+        elif isinstance(val, (bytes, bytearray)):
+            digest.update(val)
+        else:
+            digest.update(repr(val).encode())
+        digest.update(b"\n")
+
+    return digest.hexdigest()
+
+
+def submit(session_id, fn, *args, **kwargs) -> Future:
+    """
+    Queue fn(*args, **kwargs) for a worker process and return its future.
+
+    fn must be a module-level function and the inputs picklable. Raises PoolBusyError if the session or the pool
+    already has its maximum number of queued jobs.
+    """
+    key = job_key(fn, args, kwargs)
+
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None:
+            job["sessions"].add(session_id)
+            return job["future"]
+
+        queue = _sessions.get(session_id, deque())
+        if len(queue) >= MAX_QUEUED_PER_SESSION:
+            raise PoolBusyError(f"This session already has {len(queue)} calculations waiting.")
+        if sum(len(q) for q in _sessions.values()) >= MAX_QUEUED_JOBS:
+            raise PoolBusyError("The server is busy with other calculations.")
+
+        future = Future()
+        job = {"key": key, "fn": fn, "args": args, "kwargs": kwargs, "future": future, "sessions": {session_id}}
+        queue.append(job)
+        _sessions[session_id] = queue
+        _jobs[key] = job
+
+        _start_dispatcher()
+        _lock.notify_all()
+
+    return future
+
+
+def cancel_session(session_id) -> int:
+    """
+    Cancel the queued jobs of a session that stopped, reran or disconnected, except those another session also
+    submitted. Running jobs are left to finish. Returns the number of jobs cancelled.
+    """
+    cancelled = []
+    with _lock:
+        for queue in _sessions.values():
+            for job in list(queue):
+                job["sessions"].discard(session_id)
+                if not job["sessions"]:
+                    queue.remove(job)
+                    _jobs.pop(job["key"], None)
+                    cancelled.append(job["future"])
+
+    for future in cancelled:
+        future.cancel()
+
+    return len(cancelled)
+
+
+def queue_position(future: Future):
+    """
+    Number of queued jobs that go to a worker before this one, None once it is running or done.
+    """
+    with _lock:
+        queues = [list(q) for q in _sessions.values()]
+
+    # Same order as the dispatcher: one job from each session in turn
+    position = 0
+    for turn in range(max((len(q) for q in queues), default=0)):
+        for q in queues:
+            if turn < len(q):
+                if q[turn]["future"] is future:
+                    return position
+                position += 1
+
+    return None
+
+
+def pool_status() -> dict:
+    """
+    Workers, running jobs, queued jobs and sessions with queued jobs, for display.
+    """
+    with _lock:
+        return {
+            "workers": MAX_WORKERS,
+            "running": len(_running),
+            "queued": sum(len(q) for q in _sessions.values()),
+            "sessions": sum(1 for q in _sessions.values() if q),
+        }
+
+
+def worker_module_files() -> list:
+    """
+    Files of the modules imported in the worker that runs this, to check the app script is not re-run in the workers:
+
+    >>> import sys, types
+    >>> app_main = types.ModuleType("__main__")
+    >>> app_main.__file__ = "energy_main.py"
+    >>> real_main, sys.modules["__main__"] = sys.modules["__main__"], app_main
+    >>> files = submit("check", worker_module_files).result()
+    >>> sys.modules["__main__"] = real_main
+    >>> [f for f in files if f.endswith("energy_main.py") or "streamlit" in f]
+    []
+    """
+    return sorted(f for f in (getattr(m, "__file__", None) for m in list(sys.modules.values())) if f)
+
+
+def _start_dispatcher():
+    # Called with _lock held
+    global _dispatcher
+    if _dispatcher is None or not _dispatcher.is_alive():
+        _dispatcher = threading.Thread(target=_dispatch, name="compute_pool", daemon=True)
+        _dispatcher.start()
+
+
+def _next_job():
+    # Called with _lock held: the first job of the next session in turn, that session then goes to the back
+    for session_id in list(_sessions):
+        queue = _sessions[session_id]
+        if not queue:
+            del _sessions[session_id]
+            continue
+        _sessions.move_to_end(session_id)
+        return queue.popleft()
+
+    return None
+
+
+def _dispatch():
+    # Hand queued jobs to the workers, never more than MAX_WORKERS at a time so the turn order is kept here
+    global _executor
+    while True:
+        with _lock:
+            while len(_running) >= MAX_WORKERS or not any(_sessions.values()):
+                _lock.wait()
+            job = _next_job()
+            _running.add(job["key"])
+
+            if not job["future"].set_running_or_notify_cancel():
+                _running.discard(job["key"])
+                _jobs.pop(job["key"], None)
+                continue
+
+            if _executor is None:
+                _executor = ProcessPoolExecutor(MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            executor = job["executor"] = _executor
+
+        # Workers are started inside executor.submit, the first MAX_WORKERS times and after a restart
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = _WORKER_MAIN
+        try:
+            worker_future = executor.submit(job["fn"], *job["args"], **job["kwargs"])
+        except Exception as e:
+            _finish(job, None, e)
+            continue
+        finally:
+            if sys.modules["__main__"] is _WORKER_MAIN:
+                sys.modules["__main__"] = main
+        worker_future.add_done_callback(lambda f, job=job: _finish(job, f))
+
+
+def _finish(job, worker_future, error=None):
+    global _executor
+    if error is None:
+        error = worker_future.exception()
+
+    with _lock:
+        _running.discard(job["key"])
+        _jobs.pop(job["key"], None)
+        # A worker died (e.g. out of memory): start a fresh pool for the next jobs
+        if isinstance(error, BrokenProcessPool) and _executor is job["executor"]:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        _lock.notify_all()
+
+    if error is not None:
+        job["future"].set_exception(error)
+    else:
+        job["future"].set_result(worker_future.result())
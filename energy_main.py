@@ -5,12 +5,20 @@ This script runs the web app user interface
 
 """
 
+from concurrent.futures import wait
 import streamlit as st
 import pandas as pd
-from helpers_v3 import prepare_weather_df, call_cropData, airflowrate_perAHU_m3h, output_excel
+from helpers_v3 import prepare_weather_df, call_cropData, airflowrate_perAHU_m3h, submit_output_excel, row_hours
 import active_cooling_v2
 import heating_v1
 import info_page_v2
+import campus_page_v1
+import charts_v1
+import climate_shift_v1
+import progressive_v1
+import calibration_v1
+import pool_ui_v1
+from weather_resample_v1 import RESOLUTION_OPTIONS
 # import shade_selector
 
 eta = 0.8   # This is the maximum allowable padwall efficiency
@@ -33,10 +41,36 @@ crop_list = [
     "SWEET POINT PEPPER",
     "BELL PEPPER"
 ]
+
+def report_download(report_future):
+    # The result tables are already on the page, show a progress state until the workbook is ready
+    placeholder = st.empty()
+    if not report_future.done():
+        with placeholder.status("Building Excel report...", state="running"):
+            st.caption("Results are ready above, the workbook is still being written.")
+            wait([report_future])
+    placeholder.empty()
+
+    if report_future.exception() is not None:
+        st.error(f"Excel report could not be built: {report_future.exception()}")
+        return
+
+    st.download_button(
+        label="Download Results as Excel",
+        data=report_future.result,
+        file_name="energy_model_results.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
+    )
+
+def cancel_calculation():
+    # Runs before the rerun that stops the calculation in progress
+    st.session_state["calculation_cancelled"] = True
+
 st.sidebar.title("Navigation")
 
 # page = st.sidebar.radio("Go to:", ["Calculator","Info", "Shade Selector Tool"], index=0)
-page = st.sidebar.radio("Go to:", ["Calculator","Info"], index=0)
+page = st.sidebar.radio("Go to:", ["Calculator","Campus","Info"], index=0)
 
 with st.sidebar:
     with open("Productsheets.pdf", "rb") as f:
@@ -58,6 +92,15 @@ if page == "Calculator":
         "**Make sure column titles match:**  \n"
         "Local Time, Temperature (C), Relative Humidity (%), Solar Radiation (W/m²)")
     weather_upload = st.file_uploader("Upload weather Excel from ksgclimatedata.streamlit.app", type=["xlsx"])
+    resolution_label = st.selectbox(
+        "Model Time Resolution",
+        list(RESOLUTION_OPTIONS),
+        help="Sub-hourly station data (e.g. 1 or 5 minute) is averaged to this resolution before the models run."
+    )
+    typical_year = st.checkbox(
+        "Build a Typical Meteorological Year from a multi-year upload",
+        help="Selects the most typical month of each calendar month across the uploaded years (Sandia method)."
+    )
 
     # Upload crop data
     st.header("Upload Crop Data")
@@ -114,16 +157,47 @@ if page == "Calculator":
         hours_of_heat_storage = st.number_input("Hours of Heat Storage", value=8, step=1)
         peak_percentile = st.selectbox("Peak Demand Percentile", [98, 95, 92.5, 90, 85])
 
+        st.subheader("Climate Shift Ensemble")
+        st.markdown("*Optional: re-evaluate the design loads with the weather year shifted warmer, e.g. +0 to +4 C in 0.5 C steps.*")
+        run_ensemble = st.checkbox("Evaluate climate shifts")
+        col21, col22, col23 = st.columns(3)
+        with col21:
+            max_temp_shift = st.number_input("Max Temperature Shift (C)", value=4.0, step=0.5)
+        with col22:
+            temp_shift_step = st.number_input("Temperature Shift Step (C)", min_value=0.1, value=0.5, step=0.1)
+        with col23:
+            rh_shift_text = st.text_input("RH Adjustments (%), comma separated", value="0")
+
+        st.subheader("Calibration")
+        st.markdown("*Optional: fit the heat loss parameters to the measured heating energy of an existing greenhouse. The values above are the starting point and are used for the parameters not fitted.*")
+        measured_upload = st.file_uploader("Upload measured heating energy Excel (Local Time, Heating Energy (kWh))", type=["xlsx"])
+        col41, col42 = st.columns(2)
+        with col41:
+            measurement_interval = st.selectbox("Measurement Interval", list(calibration_v1.MEASUREMENT_INTERVALS))
+        with col42:
+            boiler_eff = st.number_input("Boiler Efficiency (%)", 1, 100, 90, step=1, help="Converts metered gas energy to heat delivered.")
+        fit_params = st.multiselect("Parameters to Fit", list(calibration_v1.FIT_PARAMETERS), default=["u_leak", "u_roof"])
+
+        st.subheader("Execution")
+        progressive = st.checkbox(
+            "Progressive calculation",
+            help="Processes the weather in chunks and shows provisional percentiles as it goes. The run can be cancelled."
+        )
+
         run = st.form_submit_button("Calculate")
 
 
 
+    if st.session_state.pop("calculation_cancelled", False):
+        st.warning("Calculation cancelled.")
+
 # ---------- STEP 2: Run energy calculations ---------- #
     if run:
 
     # Clean data and append crop parameters to the weather DataFrame
-        weather_df = prepare_weather_df(
-            weather_upload,
+        weather_future = pool_ui_v1.pool_submit(
+            prepare_weather_df,
+            weather_upload.getvalue() if weather_upload is not None else None,
             t_day,
             t_night,
             rh_day, 
@@ -133,23 +207,98 @@ if page == "Calculator":
             tmax_day,
             tmax_night,
             tmin_day,
-            tmin_night
+            tmin_night,
+            RESOLUTION_OPTIONS[resolution_label],
+            typical_year
         )
+        try:
+            (weather_df, weather_report, tmy_selection), = pool_ui_v1.pool_results("Processing weather data...", [weather_future])
+        except ValueError as e:
+            st.error(f"Weather data could not be processed: {e}")
+            st.stop()
         st.success("Weather data successfully processed")
 
+        if tmy_selection is not None:
+            with st.expander("Typical Meteorological Year: selected months"):
+                st.markdown("The year of each month with the lowest weighted Finkelstein-Schafer statistic among the most typical candidates.")
+                st.dataframe(tmy_selection)
+
+    # Report the detected time resolution and any problems found in the timestamps
+        st.caption(
+            f"Detected a {weather_report['cadence']} time step in {weather_report['rows']:,} rows, "
+            f"modelled at {weather_report['target']} in {weather_report['rows_out']:,} rows."
+        )
+        if weather_report["duplicates"] or not weather_report["gaps"].empty or not weather_report["dst_anomalies"].empty:
+            with st.expander(
+                f":orange[**Weather data issues:** {weather_report['duplicates']} duplicate timestamps, "
+                f"{len(weather_report['gaps'])} gaps, {len(weather_report['dst_anomalies'])} likely DST changes]"
+            ):
+                st.markdown("Duplicate timestamps are averaged. Gaps are left out, not filled.")
+                if not weather_report["gaps"].empty:
+                    st.dataframe(weather_report["gaps"])
+                if not weather_report["dst_anomalies"].empty:
+                    st.dataframe(weather_report["dst_anomalies"])
+
     # Count AHU and AHU_area
         AHU_count = AHU_count_pertruss * truss_count
         area_m2 = truss_length / 1000 / AHU_count_pertruss * airtube_length
         AHU_type, airflow_m3_h = airflowrate_perAHU_m3h(truss_length, trolley_selection, AHU_count_pertruss)
 
-    # Run heating load calculation
-        
+    # Select the calculation methods
         if heating_method == "True Setpoint":
             heating_target = "T_set_C"
         else:
             heating_target = "T_min_C"
 
-        heating_df = heating_v1.build_hourly_heating_df_TWO_OPTIONS(weather_df, scr1_eff, scr2_eff, heating_target)
+        if cooling_method == "True Temperature and RH Setpoints":
+            load_col = "Q_active_W_m2_strict_setpoint"
+        else:
+            load_col = "Q_active_W_m2_Tmax"
+
+    # Progressive mode: both models in chunks, with provisional percentiles after each chunk
+        if progressive:
+            progress_bar = st.progress(0.0, text="Starting calculation...")
+            cancel_slot = st.empty()
+            cancel_slot.button("Cancel calculation", on_click=cancel_calculation)
+            estimates = st.empty()
+            hours = row_hours(weather_df)
+
+            for update in progressive_v1.progressive_loads(
+                weather_df, scr1_eff, scr2_eff, heating_target, airflow_m3_h, area_m2, cladd, u_leak, u_roof
+            ):
+                progress_bar.progress(
+                    update["done"] / update["total"],
+                    text=f"Processed {update['done']} of {update['total']} chunks of the weather data"
+                )
+                with estimates.container():
+                    st.caption("Provisional estimates with 95% confidence intervals, they narrow as more hours are processed.")
+                    col31, col32 = st.columns(2)
+                    with col31:
+                        st.markdown("**Heating**")
+                        st.dataframe(progressive_v1.provisional_summary(
+                            update["loads"]["Q_heat_W_m2"], update["computed"], hours, area_m2, AHU_count
+                        ))
+                    with col32:
+                        st.markdown("**Active Cooling**")
+                        st.dataframe(progressive_v1.provisional_summary(
+                            update["loads"][load_col], update["computed"], hours, area_m2, AHU_count
+                        ))
+
+            progress_bar.empty()
+            cancel_slot.empty()
+            estimates.empty()
+            heating_df, cooling_df = progressive_v1.loads_to_dfs(weather_df, update["loads"], heating_target)
+        else:
+            heating_future = pool_ui_v1.pool_submit(
+                heating_v1.build_hourly_heating_df_TWO_OPTIONS,
+                weather_df, scr1_eff, scr2_eff, heating_target, cladd, u_leak, u_roof
+            )
+            cooling_future = pool_ui_v1.pool_submit(
+                active_cooling_v2.build_hourly_padwall_activecool_df_TWO_OPTIONS, weather_df, airflow_m3_h, area_m2
+            )
+            heating_df, cooling_df = pool_ui_v1.pool_results("Running heating and active cooling models...", [heating_future, cooling_future])
+
+    # Run heating load calculation
         heating_results = heating_v1.heating_load_percentile_summary(heating_df, area_m2, AHU_count)
         demand_MW = heating_results.loc[peak_percentile, "Total Heating (MW)"]
         HST_volume_m3 = heating_v1.HST_volume(hours_of_heat_storage,demand_MW)
@@ -157,16 +306,34 @@ if page == "Calculator":
         st.success("Heating model completed.")
 
     # Run active cooling load calculation
-        cooling_df = active_cooling_v2.build_hourly_padwall_activecool_df_TWO_OPTIONS(weather_df, airflow_m3_h, area_m2)
-
-        if cooling_method == "True Temperature and RH Setpoints":
-            load_col = "Q_active_W_m2_strict_setpoint"
-        else:
-            load_col = "Q_active_W_m2_Tmax"
-
         cooling_results = active_cooling_v2.cooling_load_percentile_summary(cooling_df, area_m2, AHU_count, load_col)
         st.success("Active cooling model completed.")
 
+    # Run the climate shift ensemble on the same prepared weather
+        ensemble_results = None
+        if run_ensemble:
+            try:
+                rh_shifts = [float(v) for v in rh_shift_text.split(",") if v.strip()] or [0.0]
+            except ValueError:
+                st.error(f"RH adjustments must be numbers separated by commas, got '{rh_shift_text}'.")
+            else:
+                temp_shifts, rh_shift_list = climate_shift_v1.shift_grid(0.0, max_temp_shift, temp_shift_step, rh_shifts)
+                ensemble_results = climate_shift_v1.climate_shift_ensemble(
+                    weather_df,
+                    temp_shifts,
+                    rh_shift_list,
+                    scr1_eff,
+                    scr2_eff,
+                    heating_target,
+                    airflow_m3_h,
+                    area_m2,
+                    AHU_count,
+                    cladd,
+                    u_leak,
+                    u_roof
+                )
+                st.success("Climate shift ensemble completed.")
+
     # Collect inputs into a dictionary
         user_inputs = {
             "Crop": {
@@ -217,15 +384,80 @@ if page == "Calculator":
         st.caption("For conceptual design, report the 92.5 - 95th percentile range. Screens, ventilation, and fogging can make up the difference on the hottest days.")
         st.dataframe(cooling_results)
         st.markdown(f"AHU type **{AHU_type}** was selected and has a max ventilation rate of **{airflow_m3_h} m3/h**")
+
+        if measured_upload is not None:
+            measured_df = pd.read_excel(measured_upload)
+            missing = [c for c in ["Local Time", "Heating Energy (kWh)"] if c not in measured_df.columns]
+            if missing:
+                st.error(f"Measured energy is missing required columns: {missing}")
+            elif not fit_params:
+                st.error("Select at least one parameter to fit.")
+            else:
+                # Heat delivered in MWh from metered kWh
+                measured_df["Heating Energy (MWh)"] = pd.to_numeric(measured_df["Heating Energy (kWh)"], errors="coerce") / 1000 * boiler_eff / 100
+                fit_results, fit_stats, fit_comparison = calibration_v1.calibrate_heating(
+                    weather_df,
+                    measured_df,
+                    area_m2 * AHU_count,
+                    fit_params,
+                    {"cladd": cladd, "u_leak": u_leak, "u_roof": u_roof, "scr1_eff": scr1_eff, "scr2_eff": scr2_eff},
+                    heating_target,
+                    freq=calibration_v1.MEASUREMENT_INTERVALS[measurement_interval]
+                )
+
+                st.subheader("Calibration")
+                st.caption(
+                    f"Fitted to {fit_stats['periods']:,} {measurement_interval.lower()} periods in {fit_stats['iterations']} iterations "
+                    f"({fit_stats['model_evaluations']:,} model evaluations)."
+                )
+                if not fit_stats["identifiable"]:
+                    st.warning(
+                        "The measured energy only determines a day and a night heat loss coefficient, so these parameters cannot be fitted separately. "
+                        "Cladd, U_roof and screen 1 only enter as their product: fit one of them with U_leak or screen 2, or U_leak with screen 2, "
+                        "and keep the others fixed."
+                    )
+                st.dataframe(fit_results)
+                col51, col52, col53, col54 = st.columns(4)
+                col51.metric("CV(RMSE)", f"{fit_stats['CV(RMSE) (%)']:.1f}%")
+                col52.metric("NMBE", f"{fit_stats['NMBE (%)']:.1f}%")
+                col53.metric("R²", f"{fit_stats['R2']:.3f}")
+                col54.metric("RMSE", f"{fit_stats['RMSE (MWh)']:.3f} MWh")
+                st.line_chart(
+                    charts_v1.long_format(
+                        {label: charts_v1.downsample_series(fit_comparison[label]) for label in fit_comparison.columns},
+                        "Period",
+                        "Energy (MWh)"
+                    ),
+                    x="Period",
+                    y="Energy (MWh)",
+                    color="Series"
+                )
+
+        if ensemble_results is not None:
+            st.subheader("Climate Shift Ensemble")
+            st.caption(f"Design loads at the {peak_percentile}th percentile versus temperature shift. Crop setpoints and day/night hours are not shifted.")
+            cooling_label = "Total Cooling, Setpoint (MW)" if load_col == "Q_active_W_m2_strict_setpoint" else "Total Cooling, Tmax (MW)"
+            design_loads = ensemble_results.xs(peak_percentile, axis=1, level="Percentile")[["Total Heating (MW)", cooling_label]]
+            ensemble_chart = design_loads.reset_index().melt(
+                id_vars=["Temp Shift (C)", "RH Shift (%)"], var_name="Load", value_name="MW"
+            )
+            ensemble_chart["Series"] = ensemble_chart["Load"] + ", RH " + ensemble_chart["RH Shift (%)"].map("{:+g}%".format)
+            st.line_chart(ensemble_chart, x="Temp Shift (C)", y="MW", color="Series")
+            st.dataframe(design_loads)
     
-        # --- Format to Excel and allow download --- #
-        excel_file = output_excel(user_inputs, heating_results, cooling_results)
-        st.download_button(
-            label="Download Results as Excel",
-            data=excel_file,
-            file_name="energy_model_results.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        # --- Format to Excel in the background, chart the hourly loads while it builds --- #
+        _, report_future = submit_output_excel(user_inputs, heating_results, cooling_results)
+
+        charts_v1.render_load_charts({
+            f"Heating ({heating_method})": heating_df.set_index("timestamp")["Q_heat_W_m2"],
+            "Cooling (True Temperature and RH Setpoints)": cooling_df.set_index("timestamp")["Q_active_W_m2_strict_setpoint"],
+            "Cooling (Maximum Allowed Temperature)": cooling_df.set_index("timestamp")["Q_active_W_m2_Tmax"],
+        })
+
+        report_download(report_future)
+
+elif page == "Campus":
+    campus_page_v1.render(crop_list)
 
 elif page == "Info":
     info_page_v2.render()
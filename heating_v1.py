@@ -6,6 +6,7 @@ This script contains all technical functions needed for the heating calculations
 
 import pandas as pd
 import numpy as np
+from helpers_v3 import weighted_percentile, row_hours
 
 def build_hourly_heating_df_TWO_OPTIONS(
     df_weather: pd.DataFrame,
@@ -53,6 +54,7 @@ def build_hourly_heating_df_TWO_OPTIONS(
 
         rows.append({
             "timestamp": r["timestamp"],
+            "interval_h": r.get("Interval (h)", 1.0),
             "T_out_C": t_out,
             "T_target": t_target,
             "U_scr": u_scr,
@@ -62,6 +64,36 @@ def build_hourly_heating_df_TWO_OPTIONS(
     return pd.DataFrame(rows)
 
 
+def heating_load_W_m2(
+    t_out,
+    is_day,
+    t_target,
+    scr1_eff,
+    scr2_eff,
+    cladd=1.2,
+    u_leak=0.7,
+    u_roof=6.9
+):
+    """
+    Array version of build_hourly_heating_df_TWO_OPTIONS, returns Q_heat_W_m2 only.
+
+    Inputs and parameters are scalars or NumPy arrays of any broadcastable shape. Hours the builder would skip
+    (missing outdoor or target temperature) are NaN.
+    """
+    t_out = np.asarray(t_out, dtype=float)
+    t_target = np.asarray(t_target, dtype=float)
+    scr1_eff = np.asarray(scr1_eff, dtype=float)/100
+    scr2_eff = np.asarray(scr2_eff, dtype=float)/100
+
+    # Screen 1 is closed whenever heating is needed, screen 2 only at night
+    u_scr1 = u_roof * (1 - scr1_eff)
+    u_scr = np.where(np.asarray(is_day) == 1, u_scr1, u_scr1 * (1 - scr2_eff))
+
+    Q = np.where(t_out < t_target, (u_scr * cladd + u_leak) * (t_target - t_out), 0.0)
+
+    return np.where(np.isnan(t_out) | np.isnan(t_target), np.nan, Q)
+
+
 def HST_volume(
     hours_backup: float,
     demand_MW: float,
@@ -89,7 +121,11 @@ def heating_load_percentile_summary(
         raise KeyError(f"'{load_col}' not found in df_output columns: {list(df_output.columns)}")
 
     # Extracts all values as a numpy array of floats, dropping all missing values
-    vals = df_output[load_col].dropna().to_numpy(dtype=float)
+    valid = df_output[load_col].notna()
+    vals = df_output.loc[valid, load_col].to_numpy(dtype=float)
+
+    hours = row_hours(df_output)[valid.to_numpy()]
+
     if vals.size == 0:
         return {}, f"--- {label} ---\nNo valid values found in '{load_col}'."
 
@@ -98,7 +134,7 @@ def heating_load_percentile_summary(
     # For each percentile (85, 90, 92.5, 95 and 98) compute the heating requirement in W/m2, then convert to kW
     for p in percentiles:
         # Percentile of W/m²
-        w_m2 = float(np.percentile(vals, p))
+        w_m2 = float(weighted_percentile(vals, hours, p))
 
         # kW (W/m² * area / 1000)
         per_AHU_heating_kw = (w_m2 * area_m2) / 1000.0
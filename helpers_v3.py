@@ -10,7 +10,21 @@ Updates from v2:
 
 import pandas as pd
 import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from weather_resample_v1 import resample_weather
+from tmy_v1 import build_typical_year
+
+WEIGHT_RTOL = 1e-6      # Relative spread below which weighted_percentile treats the weights as equal
+
+# Background Excel report building, shared by every session of the app
+REPORT_CACHE_SIZE = 32
+_report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="excel_report")
+_report_cache = OrderedDict()
+_report_lock = threading.Lock()
 
 
 def prepare_weather_df(
@@ -24,10 +38,14 @@ def prepare_weather_df(
     tmax_day: float,
     tmax_night: float,
     tmin_day: float,
-    tmin_night: float
+    tmin_night: float,
+    resolution: str = "1h",
+    typical_year: bool = False
 ):
     
-    # Convert to DataFrame
+    # Convert to DataFrame, uploads sent to a compute_pool_v1 worker arrive as raw bytes
+    if isinstance(upload, bytes):
+        upload = BytesIO(upload)
     if upload is not None:
         df = pd.read_excel(upload)
 
@@ -38,11 +56,15 @@ def prepare_weather_df(
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
     
-    #     Add column for formatted Date/Time
-    df["timestamp"] = pd.to_datetime(df["Local Time"])
-    #     Convert these columns to integer data type
-    for col in ["Temperature (C)", "Relative Humidity (%)", "Solar Radiation (W/m²)"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+    #     Reduce a multi-year upload to one typical year (hourly), selected month by month
+    tmy_selection = None
+    if typical_year:
+        df, tmy_selection = build_typical_year(df)
+
+    #     Average sub-hourly data to the model resolution (None keeps the original), adds "timestamp" and "Interval (h)"
+    #     The report (cadence, duplicates, gaps, DST changes) and the TMY selection are returned next to the frame,
+    #     not kept in df.attrs: pandas copies attrs into every derived object, including each row of the builders' iterrows
+    df, weather_report = resample_weather(df, resolution)
     #     Add a column indicating if it is day or night based on solar radiation
     df["is_day"] = np.where(df["Solar Radiation (W/m²)"] > 0, 1, 0)
 
@@ -52,7 +74,7 @@ def prepare_weather_df(
     df["T_max_C"] = np.where(df["is_day"] == 1, tmax_day, tmax_night)
     df["T_min_C"] = np.where(df["is_day"] == 1, tmin_day, tmin_night)
 
-    return df
+    return df, weather_report, tmy_selection
     
 def call_cropData(crop_name):
     
@@ -176,3 +198,93 @@ def output_excel(inputs_dict, heating_df, cooling_df):
     output.seek(0)          # reset cursor to the beginning of the data
     return output
 
+def weighted_percentile(vals, weights, percentiles):
+    """
+    Percentiles of vals where each value counts for its weight (e.g. hours), instead of once per row.
+
+    Unequal weights use midpoint ranks: each value sits at the middle of its share of the total weight.
+    Weights equal to within WEIGHT_RTOL (hourly data, or a uniform resampled step) use np.percentile's linear ranks
+    instead, so those results match np.percentile exactly. The two rank definitions differ by up to one value step
+    (about 1/n), which is the jump between nearly equal and clearly unequal weights.
+
+    >>> weighted_percentile([0, 100], [1, 99], [50]).round(6).tolist()
+    [99.0]
+    >>> weighted_percentile([1, 2, 3, 4], [1, 1, 1, 3], [50, 98]).round(6).tolist()
+    [3.25, 4.0]
+    >>> bool(weighted_percentile([1, 2, 3, 4], [1, 1, 1, 1.0000001], [98]) == np.percentile([1, 2, 3, 4], 98))
+    True
+    >>> weighted_percentile([0, 100], [1, 99], [50]).round(6).tolist()
+    [99.0]
+    >>> weighted_percentile([1, 2, 3, 4], [1, 1, 1, 3], [50, 98]).round(6).tolist()
+    [3.25, 4.0]
+    """
+    vals = np.asarray(vals, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if weights.size == 0 or np.allclose(weights, weights[0], rtol=WEIGHT_RTOL, atol=0):
+        return np.percentile(vals, percentiles)
+
+    order = np.argsort(vals)
+    vals, weights = vals[order], weights[order]
+
+    # Each value sits at the midpoint of its share of the total weight, linear interpolation in between
+    total = weights.sum()
+    if total <= 0:
+        return np.percentile(vals, percentiles)
+    ranks = (np.cumsum(weights) - 0.5 * weights) / total
+
+    return np.interp(np.asarray(percentiles, dtype=float) / 100.0, ranks, vals)
+
+def row_hours(df):
+    """
+    Hours represented by each row: "Interval (h)" of the weather or "interval_h" of the builder outputs,
+    one per row if neither is there (hourly data that was not resampled).
+    """
+    for col in ("Interval (h)", "interval_h"):
+        if col in df.columns:
+            return df[col].to_numpy(dtype=float)
+
+    return np.ones(len(df))
+
+def report_input_hash(inputs_dict, heating_df, cooling_df):
+    """
+    Stable key for a report: hashes the flattened inputs and the contents of both result tables.
+    """
+    digest = hashlib.sha256()
+
+    for section, values in inputs_dict.items():
+        for key, val in values.items():
+            digest.update(f"{section}|{key}|{val!r}\n".encode())
+
+    for df in (heating_df, cooling_df):
+        digest.update(repr(list(df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+def submit_output_excel(inputs_dict, heating_df, cooling_df):
+    """
+    Queue output_excel on a background thread and return (key, future).
+
+    Identical inputs reuse the cached future, so the workbook is only built once per input hash.
+    The future resolves to the raw bytes of the workbook.
+    """
+    key = report_input_hash(inputs_dict, heating_df, cooling_df)
+
+    with _report_lock:
+        future = _report_cache.get(key)
+        if future is not None and not (future.done() and future.exception() is not None):
+            _report_cache.move_to_end(key)
+            return key, future
+
+        # Copy the tables so later edits by the caller cannot change the queued report
+        heating_copy, cooling_copy = heating_df.copy(), cooling_df.copy()
+        future = _report_executor.submit(
+            lambda: output_excel(inputs_dict, heating_copy, cooling_copy).getvalue()
+        )
+        _report_cache[key] = future
+
+        # Evict the oldest reports once the cache is full
+        while len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+
+    return key, future
@@ -30,6 +30,29 @@ def render():
     - **U_roof**: Accounts for heat loss through the glass roof. Adjust this value only if the roof is not made of glass.
     - **Screen 1 Energy Efficiency**: This is the energy saving efficiency of the lower, "first" screen and will be assumed closed during the day & night in the calculations
     - **Screen 2 Energy Efficiency**: This is the energy saving efficiency of the upper, "second" screen and will be assumed closed during the night in the calculations
+
+    **Model Time Resolution**  \n
+    Weather with a time step shorter than the selected resolution (e.g. 1 or 5 minute station data) is averaged to it before the calculations.
+    Each row is weighted by the hours it represents in the percentiles. Gaps, duplicate timestamps and likely daylight saving time changes are reported.
+
+    **Typical Meteorological Year**  \n
+    For uploads spanning several years, the calculator can reduce the data to one representative year before the calculations.
+    For each calendar month, the year whose daily temperature, RH and solar radiation distributions are closest to the long-term distributions
+    (weighted Finkelstein-Schafer statistics, Sandia method) is selected.
+
+    **Progressive Calculation**  \n
+    The weather is processed in chunks spread evenly over the year. Provisional percentiles with 95% confidence intervals are shown after each chunk,
+    and the run can be cancelled. The final results are the same as a normal run.
+
+    **Campus**  \n
+    The Campus page sizes a shared heating plant, chiller plant and HST for several greenhouse blocks. The hourly loads of all blocks (W/m² x area) are summed
+    before the percentiles are taken, so the result is the coincident load. The diversity factor compares it to the sum of each block's own percentile.
+    
+    **Calibration**  \n
+    For an existing greenhouse, upload measured heating energy (hourly or monthly) and the selected heat loss parameters are fitted to it by least squares.
+    The model only separates a day and a night heat loss coefficient, and Cladd, U_roof and screen 1 only enter as their product. Fit one of those
+    with U_leak or screen 2, or U_leak with screen 2; the fitted values come with standard errors,
+    and CV(RMSE) and NMBE show how well the calibrated model matches the measurements.
     
     """
     )
@@ -125,6 +148,14 @@ def render():
     """
     )
 
+    st.markdown(
+        """
+    ---
+    **Climate Shift Ensemble**: Optionally, the uploaded weather year is re-evaluated with every combination of a temperature shift (C) and an RH adjustment (% points).
+    Crop setpoints and day/night hours stay the same. The design loads at the selected percentile are reported for each shift so the design can be checked against a warmer future climate.
+    """
+    )
+
     st.markdown("""
     ---
                 """)
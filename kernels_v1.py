@@ -0,0 +1,199 @@
+"""
+
+This script contains the single-step kernels for embedding the greenhouse models in a time-stepping simulation
+
+One call evaluates one time step (or a small batch) of the pad wall, active cooling and heating models. There is no
+pandas and no per-call dict: inputs are plain floats, results are written into a preallocated output buffer,
+and the psychrometrics are inlined scalar versions of the psychrolib SI equations, same iterations and tolerances.
+
+Typical use:
+    heat_coeffs = heating_coefficients(scr1_eff=47, scr2_eff=50)
+    out = empty_output()
+    for each step: step(out, t_out, rh_out, is_day, t_set, rh_set, rh_cap, t_max, t_target, heat_coeffs)
+
+"""
+
+from math import exp, log
+
+import numpy as np
+
+P_ATM = 101325.0        # Atmospheric Pressure (Pa)
+ETA = 0.8               # Maximum padwall efficiency, same as active_cooling_v2.eta
+MIN_HUM_RATIO = 1e-7
+TOLERANCE = 0.001       # psychrolib SI tolerance on temperatures (C)
+MAX_ITER_COUNT = 100
+
+# Fields of the output buffer
+N_FIELDS = 8
+ETA_USED = 0
+T_PW_C = 1
+RH_PW_PCT = 2
+W_PW_KGW_KGDA = 3
+H_PW_J_KGDA = 4
+ACTIVE_J_KG_STRICT_SETPOINT = 5
+ACTIVE_J_KG_TMAX = 6
+Q_HEAT_W_M2 = 7
+
+
+def empty_output(n: int = None) -> np.ndarray:
+    """
+    Output buffer for step (n=None, shape (N_FIELDS,)) or step_many (shape (n, N_FIELDS)). Allocate once, reuse every step.
+    """
+    return np.empty(N_FIELDS if n is None else (n, N_FIELDS))
+
+
+def heating_coefficients(scr1_eff: float, scr2_eff: float, cladd: float = 1.2, u_leak: float = 0.7, u_roof: float = 6.9):
+    """
+    (day, night) heat loss coefficients in W/m²/K, as in build_hourly_heating_df_TWO_OPTIONS. Compute once per simulation.
+    """
+    u_scr_day = u_roof * (1 - scr1_eff / 100)
+    u_scr_night = u_scr_day * (1 - scr2_eff / 100)
+
+    return (u_scr_day * cladd + u_leak, u_scr_night * cladd + u_leak)
+
+
+def _sat_vap_pres(t):
+    T = t + 273.15
+    if t <= 0.01:
+        return exp(-5.6745359E+03 / T + 6.3925247 - 9.677843E-03 * T + 6.2215701E-07 * T * T
+                   + 2.0747825E-09 * T * T * T - 9.484024E-13 * T * T * T * T + 4.1635019 * log(T))
+    return exp(-5.8002206E+03 / T + 1.3914993 - 4.8640239E-02 * T + 4.1764768E-05 * T * T
+               - 1.4452093E-08 * T * T * T + 6.5459673 * log(T))
+
+
+def _dln_sat_vap_pres(t):
+    T = t + 273.15
+    if t <= 0.01:
+        return (5.6745359E+03 / (T * T) - 9.677843E-03 + 2 * 6.2215701E-07 * T
+                + 3 * 2.0747825E-09 * T * T - 4 * 9.484024E-13 * T * T * T + 4.1635019 / T)
+    return (5.8002206E+03 / (T * T) - 4.8640239E-02 + 2 * 4.1764768E-05 * T
+            - 3 * 1.4452093E-08 * T * T + 6.5459673 / T)
+
+
+def _hum_ratio_from_rel_hum(t, rh_frac):
+    vp = rh_frac * _sat_vap_pres(t)
+    W = 0.621945 * vp / (P_ATM - vp)
+    return W if W > MIN_HUM_RATIO else MIN_HUM_RATIO
+
+
+def _enthalpy(t, W):
+    if W < MIN_HUM_RATIO:
+        W = MIN_HUM_RATIO
+    return (1.006 * t + W * (2501. + 1.86 * t)) * 1000
+
+
+def _t_wet_bulb(t, W):
+    # Dew point by Newton-Raphson, then bisection between dew point and dry bulb, as in psychrolib
+    if W < MIN_HUM_RATIO:
+        W = MIN_HUM_RATIO
+    ln_vp = log(P_ATM * W / (0.621945 + W))
+
+    t_dew = t
+    for _ in range(MAX_ITER_COUNT + 1):
+        t_iter = t_dew
+        t_dew = t_iter - (log(_sat_vap_pres(t_iter)) - ln_vp) / _dln_sat_vap_pres(t_iter)
+        t_dew = min(max(t_dew, -100.0), 200.0)
+        if abs(t_dew - t_iter) <= TOLERANCE:
+            break
+    else:
+        raise ValueError("Convergence not reached for the dew point.")
+
+    sup = t
+    inf = min(t_dew, t)
+    t_wb = (inf + sup) / 2
+    for _ in range(MAX_ITER_COUNT):
+        if sup - inf <= TOLERANCE:
+            return t_wb
+        vp = _sat_vap_pres(t_wb)
+        Ws = 0.621945 * vp / (P_ATM - vp)
+        if Ws < MIN_HUM_RATIO:
+            Ws = MIN_HUM_RATIO
+        if t_wb >= 0.0:
+            W_star = ((2501. - 2.326 * t_wb) * Ws - 1.006 * (t - t_wb)) / (2501. + 1.86 * t - 4.186 * t_wb)
+        else:
+            W_star = ((2830. - 0.24 * t_wb) * Ws - 1.006 * (t - t_wb)) / (2830. + 1.86 * t - 2.1 * t_wb)
+        if W_star < MIN_HUM_RATIO:
+            W_star = MIN_HUM_RATIO
+        if W_star > W:
+            sup = t_wb
+        else:
+            inf = t_wb
+        t_wb = (sup + inf) / 2
+
+    raise ValueError("Convergence not reached for the wet bulb temperature.")
+
+
+def step(out, t_out, rh_out, is_day, t_set, rh_set, rh_cap, t_max, t_target, heat_coeffs):
+    """
+    One time step of the pad wall, active cooling (J/kg dry air, both options) and heating (W/m²) models.
+
+    Temperatures in C, RH in %, is_day 1/0, heat_coeffs from heating_coefficients. Results are written into out
+    (see the field constants) and out is returned. Any NaN input gives NaN outputs.
+    """
+    if t_out != t_out or rh_out != rh_out or t_set != t_set or rh_set != rh_set or rh_cap != rh_cap \
+            or t_max != t_max or t_target != t_target:
+        out[:] = np.nan
+        return out
+
+    # outdoor
+    W_out = _hum_ratio_from_rel_hum(t_out, rh_out / 100.0)
+    h_out = _enthalpy(t_out, W_out)
+
+    # padwall only runs when temperature exceeds Tmax, limited by the RH cap referenced at Tmax
+    if t_out > t_max:
+        t_wb = _t_wet_bulb(t_out, W_out)
+        W_sat_wb = _hum_ratio_from_rel_hum(t_wb, 1.0)
+        h_sat_wb = _enthalpy(t_wb, W_sat_wb)
+        W_cap = _hum_ratio_from_rel_hum(t_max, rh_cap / 100.0)
+
+        denom_W = W_sat_wb - W_out
+        if denom_W <= 1e-12:
+            eta_used = 0.0
+        else:
+            eta_used = min(ETA, (W_cap - W_out) / denom_W)
+            eta_used = min(max(eta_used, 0.0), ETA)
+
+        W_pw = W_out + eta_used * (W_sat_wb - W_out)
+        h_pw = h_out + eta_used * (h_sat_wb - h_out)
+        W_b = W_pw if W_pw > MIN_HUM_RATIO else MIN_HUM_RATIO
+        T_pw = (h_pw / 1000.0 - 2501.0 * W_b) / (1.006 + 1.86 * W_b)
+        RH_pw = P_ATM * W_b / (0.621945 + W_b) / _sat_vap_pres(T_pw) * 100.0
+    else:
+        eta_used = 0.0
+        W_pw = W_out
+        h_pw = h_out
+        T_pw = t_out
+        RH_pw = rh_out
+
+    # Option 1: strict setpoint, Option 2: Tmax at the padwall moisture
+    h_set = _enthalpy(t_set, _hum_ratio_from_rel_hum(t_set, rh_set / 100.0))
+    active1 = h_pw - h_set
+    active2 = h_pw - _enthalpy(t_max, W_pw)
+
+    # Heating: screen 2 only closed at night
+    if t_out < t_target:
+        Q_heat = (heat_coeffs[0] if is_day else heat_coeffs[1]) * (t_target - t_out)
+    else:
+        Q_heat = 0.0
+
+    out[ETA_USED] = eta_used
+    out[T_PW_C] = T_pw
+    out[RH_PW_PCT] = RH_pw
+    out[W_PW_KGW_KGDA] = W_pw
+    out[H_PW_J_KGDA] = h_pw
+    out[ACTIVE_J_KG_STRICT_SETPOINT] = active1 if active1 > 0.0 else 0.0
+    out[ACTIVE_J_KG_TMAX] = active2 if active2 > 0.0 else 0.0
+    out[Q_HEAT_W_M2] = Q_heat
+
+    return out
+
+
+def step_many(out, t_out, rh_out, is_day, t_set, rh_set, rh_cap, t_max, t_target, heat_coeffs):
+    """
+    step for a small batch (e.g. zones of one simulation step): inputs are equal-length sequences or arrays,
+    out has shape (n, N_FIELDS). For long series use the array models in active_cooling_v2 and heating_v1 instead.
+    """
+    for i in range(len(t_out)):
+        step(out[i], t_out[i], rh_out[i], is_day[i], t_set[i], rh_set[i], rh_cap[i], t_max[i], t_target[i], heat_coeffs)
+
+    return out
@@ -0,0 +1,49 @@
+"""
+Page helpers for running the heavy calculations on the compute pool shared by every session (compute_pool_v1)
+"""
+
+from concurrent.futures import wait
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import compute_pool_v1
+
+
+def session_id():
+    return get_script_run_ctx().session_id
+
+
+def pool_submit(fn, *args):
+    # Queue a heavy calculation on the worker pool, stop this run if the queue is full
+    try:
+        return compute_pool_v1.submit(session_id(), fn, *args)
+    except compute_pool_v1.PoolBusyError as e:
+        # Jobs this run already queued would never be collected
+        compute_pool_v1.cancel_session(session_id())
+        st.error(f"{e} Please try again in a moment.")
+        st.stop()
+
+
+def pool_results(label, futures):
+    # Wait for pool jobs, showing the queue position until a worker picks them up
+    placeholder = st.empty()
+    try:
+        with placeholder.status(label, state="running") as status:
+            while True:
+                _, pending = wait(futures, timeout=0.5)
+                if not pending:
+                    break
+                ahead = [p for p in (compute_pool_v1.queue_position(f) for f in pending) if p is not None]
+                if ahead:
+                    status.update(label=f"{label} Waiting for a worker, {min(ahead)} calculations ahead in the queue.")
+                else:
+                    status.update(label=f"{label} Running.")
+            results = [f.result() for f in futures]
+    except BaseException:
+        # Stop, rerun or disconnect of the session (raised by Streamlit at the next status update), or a failed job
+        compute_pool_v1.cancel_session(session_id())
+        raise
+    placeholder.empty()
+
+    return results
@@ -0,0 +1,157 @@
+"""
+
+This script contains the progressive mode of the heating and active cooling calculations
+
+The weather is processed in strided (or shuffled) chunks through the array versions of both models, so every chunk is
+spread over the whole year. After each chunk the caller gets the loads computed so far and can show provisional
+percentiles with confidence intervals, or stop. The final loads are the same as the row-by-row builders.
+
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import active_cooling_v2
+import heating_v1
+from helpers_v3 import weighted_percentile, row_hours
+
+N_CHUNKS = 20
+
+
+def chunk_order(n_rows: int, n_chunks: int = N_CHUNKS, shuffle: bool = False, seed=None) -> list:
+    """
+    Row indices of each chunk. Strided: chunk k holds rows k, k + n_chunks, ... Shuffled: a random split.
+    """
+    n_chunks = max(1, min(n_chunks, n_rows))
+    if shuffle:
+        rows = np.random.default_rng(seed).permutation(n_rows)
+        return [np.sort(c) for c in np.array_split(rows, n_chunks)]
+
+    return [np.arange(k, n_rows, n_chunks) for k in range(n_chunks)]
+
+
+def progressive_loads(
+    df_weather: pd.DataFrame,
+    scr1_eff: float,
+    scr2_eff: float,
+    heating_target: str = "T_set_C",
+    airflow_m3_h: float = 18000.0,
+    area_m2: float = 200.0,
+    cladd: float = 1.2,
+    u_leak: float = 0.7,
+    u_roof: float = 6.9,
+    n_chunks: int = N_CHUNKS,
+    shuffle: bool = False,
+    seed=None
+):
+    """
+    Generator over the chunks of the weather. Each update is a dict with
+    "done" / "total" chunks, "computed" (bool mask of rows done so far) and "loads": full-length W/m² arrays
+    for "Q_heat_W_m2", "Q_active_W_m2_strict_setpoint" and "Q_active_W_m2_Tmax", NaN where not computed or skipped.
+    """
+    t_out = df_weather["Temperature (C)"].to_numpy(dtype=float)
+    rh_out = df_weather["Relative Humidity (%)"].to_numpy(dtype=float)
+    is_day = df_weather["is_day"].to_numpy()
+    t_target = df_weather[heating_target].to_numpy(dtype=float)
+    t_set = df_weather["T_set_C"].to_numpy(dtype=float)
+    rh_set = df_weather["RH_set_pct"].to_numpy(dtype=float)
+    rh_cap = df_weather["RH_cap_pct"].to_numpy(dtype=float)
+    t_max = df_weather["T_max_C"].to_numpy(dtype=float)
+
+    n_rows = len(df_weather)
+    loads = {
+        "Q_heat_W_m2": np.full(n_rows, np.nan),
+        "Q_active_W_m2_strict_setpoint": np.full(n_rows, np.nan),
+        "Q_active_W_m2_Tmax": np.full(n_rows, np.nan),
+    }
+    computed = np.zeros(n_rows, dtype=bool)
+
+    chunks = chunk_order(n_rows, n_chunks, shuffle, seed)
+    for k, rows in enumerate(chunks):
+        loads["Q_heat_W_m2"][rows] = heating_v1.heating_load_W_m2(
+            t_out[rows], is_day[rows], t_target[rows], scr1_eff, scr2_eff, cladd, u_leak, u_roof
+        )
+        cooling = active_cooling_v2.padwall_activecool_arrays(
+            t_out[rows], rh_out[rows], t_set[rows], rh_set[rows], rh_cap[rows], t_max[rows], airflow_m3_h, area_m2
+        )
+        loads["Q_active_W_m2_strict_setpoint"][rows] = cooling["Q_active_W_m2_strict_setpoint"]
+        loads["Q_active_W_m2_Tmax"][rows] = cooling["Q_active_W_m2_Tmax"]
+        computed[rows] = True
+
+        yield {
+            "done": k + 1,
+            "total": len(chunks),
+            "computed": computed,
+            "loads": loads,
+        }
+
+
+def provisional_summary(
+    loads_W_m2: np.ndarray,
+    computed: np.ndarray,
+    hours: np.ndarray,
+    area_m2: float,
+    AHU_count: float,
+    percentiles=(98, 95, 92.5, 90, 85),
+    confidence: float = 0.95
+) -> pd.DataFrame:
+    """
+    Provisional percentiles of the rows computed so far, with a confidence interval.
+
+    The interval comes from the sampling error of a quantile: the percentile rank p is widened by
+    z * sqrt(p (1 - p) / n_eff), with a finite-population correction for the share of rows already computed,
+    and mapped back through the sample. Once every row is computed the interval closes on the estimate.
+    """
+    sampled = computed & ~np.isnan(loads_W_m2)
+    vals = loads_W_m2[sampled]
+    weights = hours[sampled]
+    if vals.size == 0:
+        return pd.DataFrame()
+
+    # Effective sample size for weighted rows, and the share of the weather not yet sampled
+    n_eff = weights.sum() ** 2 / np.sum(weights ** 2)
+    fpc = np.sqrt(max(0.0, 1.0 - computed.sum() / computed.size))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    p = np.asarray(percentiles, dtype=float) / 100.0
+    half_width = z * np.sqrt(p * (1 - p) / n_eff) * fpc
+    estimate = weighted_percentile(vals, weights, p * 100)
+    low = weighted_percentile(vals, weights, np.clip(p - half_width, 0, 1) * 100)
+    high = weighted_percentile(vals, weights, np.clip(p + half_width, 0, 1) * 100)
+
+    W_m2_to_MW = area_m2 * AHU_count / 1e6
+    return pd.DataFrame({
+        "W_m2": estimate,
+        "Total (MW)": estimate * W_m2_to_MW,
+        "CI Low (MW)": low * W_m2_to_MW,
+        "CI High (MW)": high * W_m2_to_MW,
+    }, index=list(percentiles))
+
+
+def loads_to_dfs(df_weather: pd.DataFrame, loads: dict, heating_target: str = "T_set_C"):
+    """
+    Heating and cooling DataFrames from the finished loads, with the columns the percentile summaries and charts use.
+    Skipped hours are dropped, the same as in the row-by-row builders.
+    """
+    hours = row_hours(df_weather)
+
+    heating_df = pd.DataFrame({
+        "timestamp": df_weather["timestamp"],
+        "interval_h": hours,
+        "T_out_C": df_weather["Temperature (C)"],
+        "T_target": df_weather[heating_target],
+        "Q_heat_W_m2": loads["Q_heat_W_m2"],
+    }).dropna(subset=["Q_heat_W_m2"]).reset_index(drop=True)
+
+    cooling_df = pd.DataFrame({
+        "timestamp": df_weather["timestamp"],
+        "interval_h": hours,
+        "T_out_C": df_weather["Temperature (C)"],
+        "RH_out_pct": df_weather["Relative Humidity (%)"],
+        "Q_active_W_m2_strict_setpoint": loads["Q_active_W_m2_strict_setpoint"],
+        "Q_active_W_m2_Tmax": loads["Q_active_W_m2_Tmax"],
+    }).dropna(subset=["Q_active_W_m2_strict_setpoint"]).reset_index(drop=True)
+
+    return heating_df, cooling_df
@@ -0,0 +1,144 @@
+"""
+
+This script contains NumPy versions of the psychrolib functions (SI units) used by the heating and active cooling models
+
+psychrolib works one value at a time, so evaluating a whole weather year (or many variants of it) in a Python loop is slow.
+These functions take scalars or arrays of any shape, broadcast like NumPy, and use the same equations, bounds and
+iteration tolerances as psychrolib, so results match the row-by-row builders.
+
+"""
+
+import numpy as np
+
+ZERO_CELSIUS_AS_KELVIN = 273.15
+R_DA_SI = 287.042
+MIN_HUM_RATIO = 1e-7
+FREEZING_POINT_WATER_SI = 0.0
+TRIPLE_POINT_WATER_SI = 0.01
+TOLERANCE = 0.001       # psychrolib SI tolerance on temperatures (C)
+MAX_ITER_COUNT = 100
+T_BOUNDS = (-100.0, 200.0)
+
+
+def GetSatVapPres(TDryBulb):
+    T = np.asarray(TDryBulb, dtype=float) + ZERO_CELSIUS_AS_KELVIN
+    LnPws_ice = -5.6745359E+03 / T + 6.3925247 - 9.677843E-03 * T + 6.2215701E-07 * T**2 \
+        + 2.0747825E-09 * T**3 - 9.484024E-13 * T**4 + 4.1635019 * np.log(T)
+    LnPws_water = -5.8002206E+03 / T + 1.3914993 - 4.8640239E-02 * T + 4.1764768E-05 * T**2 \
+        - 1.4452093E-08 * T**3 + 6.5459673 * np.log(T)
+    return np.exp(np.where(T - ZERO_CELSIUS_AS_KELVIN <= TRIPLE_POINT_WATER_SI, LnPws_ice, LnPws_water))
+
+
+def _dLnPws(TDryBulb):
+    T = np.asarray(TDryBulb, dtype=float) + ZERO_CELSIUS_AS_KELVIN
+    d_ice = 5.6745359E+03 / T**2 - 9.677843E-03 + 2 * 6.2215701E-07 * T \
+        + 3 * 2.0747825E-09 * T**2 - 4 * 9.484024E-13 * T**3 + 4.1635019 / T
+    d_water = 5.8002206E+03 / T**2 - 4.8640239E-02 + 2 * 4.1764768E-05 * T \
+        - 3 * 1.4452093E-08 * T**2 + 6.5459673 / T
+    return np.where(T - ZERO_CELSIUS_AS_KELVIN <= TRIPLE_POINT_WATER_SI, d_ice, d_water)
+
+
+def GetSatHumRatio(TDryBulb, Pressure):
+    SatVapPres = GetSatVapPres(TDryBulb)
+    return np.maximum(0.621945 * SatVapPres / (Pressure - SatVapPres), MIN_HUM_RATIO)
+
+
+def GetHumRatioFromVapPres(VapPres, Pressure):
+    return np.maximum(0.621945 * VapPres / (Pressure - VapPres), MIN_HUM_RATIO)
+
+
+def GetVapPresFromHumRatio(HumRatio, Pressure):
+    BoundedHumRatio = np.maximum(HumRatio, MIN_HUM_RATIO)
+    return Pressure * BoundedHumRatio / (0.621945 + BoundedHumRatio)
+
+
+def GetHumRatioFromRelHum(TDryBulb, RelHum, Pressure):
+    return GetHumRatioFromVapPres(RelHum * GetSatVapPres(TDryBulb), Pressure)
+
+
+def GetRelHumFromHumRatio(TDryBulb, HumRatio, Pressure):
+    return GetVapPresFromHumRatio(HumRatio, Pressure) / GetSatVapPres(TDryBulb)
+
+
+def GetMoistAirEnthalpy(TDryBulb, HumRatio):
+    BoundedHumRatio = np.maximum(HumRatio, MIN_HUM_RATIO)
+    return (1.006 * TDryBulb + BoundedHumRatio * (2501. + 1.86 * TDryBulb)) * 1000
+
+
+def GetTDryBulbFromEnthalpyAndHumRatio(MoistAirEnthalpy, HumRatio):
+    BoundedHumRatio = np.maximum(HumRatio, MIN_HUM_RATIO)
+    return (MoistAirEnthalpy / 1000.0 - 2501.0 * BoundedHumRatio) / (1.006 + 1.86 * BoundedHumRatio)
+
+
+def GetMoistAirDensity(TDryBulb, HumRatio, Pressure):
+    BoundedHumRatio = np.maximum(HumRatio, MIN_HUM_RATIO)
+    MoistAirVolume = R_DA_SI * (TDryBulb + ZERO_CELSIUS_AS_KELVIN) * (1 + 1.607858 * BoundedHumRatio) / Pressure
+    return (1 + BoundedHumRatio) / MoistAirVolume
+
+
+def GetHumRatioFromTWetBulb(TDryBulb, TWetBulb, Pressure):
+    Wsstar = GetSatHumRatio(TWetBulb, Pressure)
+    W_water = ((2501. - 2.326 * TWetBulb) * Wsstar - 1.006 * (TDryBulb - TWetBulb)) \
+        / (2501. + 1.86 * TDryBulb - 4.186 * TWetBulb)
+    W_ice = ((2830. - 0.24 * TWetBulb) * Wsstar - 1.006 * (TDryBulb - TWetBulb)) \
+        / (2830. + 1.86 * TDryBulb - 2.1 * TWetBulb)
+    return np.maximum(np.where(TWetBulb >= FREEZING_POINT_WATER_SI, W_water, W_ice), MIN_HUM_RATIO)
+
+
+def GetTDewPointFromVapPres(TDryBulb, VapPres):
+    """
+    Newton-Raphson on ln(Pws), stopped per element at the same tolerance as psychrolib.
+    """
+    TDryBulb, VapPres = np.broadcast_arrays(np.asarray(TDryBulb, dtype=float), np.asarray(VapPres, dtype=float))
+    TDewPoint = TDryBulb.copy()
+    lnVP = np.log(VapPres)
+
+    active = np.isfinite(TDewPoint) & np.isfinite(lnVP)
+    for _ in range(MAX_ITER_COUNT + 1):
+        if not active.any():
+            break
+        T_iter = TDewPoint[active]
+        T_next = T_iter - (np.log(GetSatVapPres(T_iter)) - lnVP[active]) / _dLnPws(T_iter)
+        T_next = np.clip(T_next, T_BOUNDS[0], T_BOUNDS[1])
+        TDewPoint[active] = T_next
+        converged = np.abs(T_next - T_iter) <= TOLERANCE
+        active[active] = ~converged
+    if active.any():
+        raise ValueError("Convergence not reached in GetTDewPointFromVapPres. Stopping.")
+
+    return np.minimum(TDewPoint, TDryBulb)
+
+
+def GetTWetBulbFromHumRatio(TDryBulb, HumRatio, Pressure):
+    """
+    Bisection between dew point and dry bulb, stopped per element at the same tolerance as psychrolib.
+    """
+    TDryBulb, HumRatio = np.broadcast_arrays(np.asarray(TDryBulb, dtype=float), np.asarray(HumRatio, dtype=float))
+    BoundedHumRatio = np.maximum(HumRatio, MIN_HUM_RATIO)
+    TDewPoint = GetTDewPointFromVapPres(TDryBulb, GetVapPresFromHumRatio(BoundedHumRatio, Pressure))
+
+    TWetBulbSup = TDryBulb.copy()
+    TWetBulbInf = TDewPoint
+    TWetBulb = (TWetBulbInf + TWetBulbSup) / 2
+
+    active = (TWetBulbSup - TWetBulbInf) > TOLERANCE
+    for _ in range(MAX_ITER_COUNT):
+        if not active.any():
+            break
+        Wstar = GetHumRatioFromTWetBulb(TDryBulb[active], TWetBulb[active], Pressure)
+        above = Wstar > BoundedHumRatio[active]
+        sup, inf, wb = TWetBulbSup[active], TWetBulbInf[active], TWetBulb[active]
+        sup = np.where(above, wb, sup)
+        inf = np.where(above, inf, wb)
+        TWetBulbSup[active] = sup
+        TWetBulbInf[active] = inf
+        TWetBulb[active] = (sup + inf) / 2
+        active[active] = (sup - inf) > TOLERANCE
+    if active.any():
+        raise ValueError("Convergence not reached in GetTWetBulbFromHumRatio. Stopping.")
+
+    return TWetBulb
+
+
+def GetTWetBulbFromRelHum(TDryBulb, RelHum, Pressure):
+    return GetTWetBulbFromHumRatio(TDryBulb, GetHumRatioFromRelHum(TDryBulb, RelHum, Pressure), Pressure)
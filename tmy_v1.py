@@ -0,0 +1,169 @@
+"""
+
+This script builds a Typical Meteorological Year (TMY) from a multi-year weather upload
+
+Sandia method: for each calendar month, every candidate year is scored by the Finkelstein-Schafer (FS) statistic,
+i.e. how far the distribution of its daily values is from the long-term distribution of that month. The weighted sum
+of the FS statistics over the daily indices ranks the years, and of the best candidates the month whose mean and
+median are closest to the long-term values is selected. The persistence checks and the smoothing of month
+boundaries of the full Sandia/NREL procedure are not applied.
+
+Daily indices are max/min/mean temperature, max/min/mean RH (in place of dew point) and daily solar radiation.
+All months and years are scored at once with NaN-padded (month x year x day) arrays.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from weather_resample_v1 import WEATHER_COLUMNS, resample_weather
+
+TMY_YEAR = 2001         # Nominal non-leap year used for the output timestamps
+MIN_COVERAGE = 0.9      # Fraction of days a month needs to be a candidate
+N_CANDIDATES = 5
+
+# Sandia TMY weights without the wind indices, RH takes the place of dew point
+SANDIA_WEIGHTS = {
+    "T_max": 1 / 20,
+    "T_min": 1 / 20,
+    "T_mean": 2 / 20,
+    "RH_max": 1 / 20,
+    "RH_min": 1 / 20,
+    "RH_mean": 2 / 20,
+    "Solar": 12 / 20,
+}
+
+
+def daily_indices(hourly: pd.DataFrame):
+    """
+    Daily indices as NaN-padded arrays of shape (month, year, day), plus the list of years.
+    """
+    ts = hourly["timestamp"]
+    daily = hourly.groupby(ts.dt.normalize()).agg(
+        T_max=("Temperature (C)", "max"),
+        T_min=("Temperature (C)", "min"),
+        T_mean=("Temperature (C)", "mean"),
+        RH_max=("Relative Humidity (%)", "max"),
+        RH_min=("Relative Humidity (%)", "min"),
+        RH_mean=("Relative Humidity (%)", "mean"),
+        Solar=("Solar Radiation (W/m²)", "mean"),
+    )
+    # Daily total (Wh/m²) from the mean, so days with a missing hour are not penalised
+    daily["Solar"] = daily["Solar"] * 24
+
+    years = np.sort(daily.index.year.unique())
+    i_month = daily.index.month.to_numpy() - 1
+    i_year = np.searchsorted(years, daily.index.year.to_numpy())
+    i_day = daily.index.day.to_numpy() - 1
+
+    indices = {}
+    for name in SANDIA_WEIGHTS:
+        arr = np.full((12, len(years), 31), np.nan)
+        arr[i_month, i_year, i_day] = daily[name].to_numpy(dtype=float)
+        indices[name] = arr
+
+    return indices, years
+
+
+def fs_statistic(x: np.ndarray) -> np.ndarray:
+    """
+    Finkelstein-Schafer statistic of every (month, year) against the long-term distribution of that month.
+
+    x has shape (month, year, day), NaN where there is no day. Returns shape (month, year), NaN for empty months.
+    """
+    n_months, n_years, n_days = x.shape
+    valid = ~np.isnan(x)
+
+    # Long-term CDF of each month, evaluated at every daily value
+    pooled = x.reshape(n_months, 1, 1, n_years * n_days)
+    pooled_valid = valid.reshape(n_months, 1, 1, n_years * n_days)
+    n_pooled = pooled_valid.sum(axis=-1)
+    cdf_long = ((pooled <= x[..., None]) & pooled_valid).sum(axis=-1) / np.maximum(n_pooled, 1)
+
+    # Candidate CDF of each (month, year), evaluated at its own daily values
+    n_year = valid.sum(axis=-1)
+    cdf_year = ((x[..., None, :] <= x[..., :, None]) & valid[..., None, :]).sum(axis=-1) / np.maximum(n_year, 1)[..., None]
+
+    diff = np.where(valid, np.abs(cdf_year - cdf_long), 0.0)
+    with np.errstate(invalid="ignore"):
+        return diff.sum(axis=-1) / np.where(n_year > 0, n_year, np.nan)
+
+
+def build_typical_year(
+    df: pd.DataFrame,
+    weights: dict = SANDIA_WEIGHTS,
+    n_candidates: int = N_CANDIDATES
+):
+    """
+    Select a typical month from each calendar month of a multi-year weather frame.
+
+    df needs the uploaded columns (Local Time and the weather columns), any time step. Returns (tmy, selection):
+    tmy is hourly with the same columns, timestamps moved to TMY_YEAR and a "Source Year" column;
+    selection has the chosen year and weighted FS statistic per month.
+    """
+    hourly, _ = resample_weather(df, "1h")
+
+    indices, years = daily_indices(hourly)
+    if len(years) < 2:
+        raise ValueError("A typical year needs at least two years of weather data.")
+
+    # Weighted sum of the FS statistics, months with too few days are not candidates
+    ws = sum(weight * fs_statistic(indices[name]) for name, weight in weights.items())
+    days_in_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[:, None]
+    coverage = (~np.isnan(indices["T_mean"])).sum(axis=-1) / days_in_month
+    ws = np.where((coverage >= MIN_COVERAGE) & np.isfinite(ws), ws, np.inf)
+
+    # Every month needs a choice between at least two years, counting calendar years is not enough
+    # (e.g. Jan 2022 - Jan 2023 has two years but only one candidate for February to December)
+    n_covered = np.isfinite(ws).sum(axis=1)
+    if (n_covered < 2).any():
+        months = [int(m) + 1 for m in np.flatnonzero(n_covered < 2)]
+        raise ValueError(
+            f"A typical year needs at least two years of data for every month, months with fewer: {months}"
+        )
+
+    # Keep the best candidates per month (lowest weighted FS)
+    order = np.argsort(ws, axis=1)
+    candidate = np.zeros(ws.shape, dtype=bool)
+    np.put_along_axis(candidate, order[:, :n_candidates], True, axis=1)
+    candidate &= np.isfinite(ws)
+
+    # Of those, pick the month whose mean and median temperature and solar are closest to the long-term values
+    closeness = np.zeros(ws.shape)
+    for name in ("T_mean", "Solar"):
+        x = indices[name]
+        spread = np.nanstd(x.reshape(12, -1), axis=1)[:, None]
+        spread = np.where(spread > 0, spread, 1.0)
+        lt_mean = np.nanmean(x.reshape(12, -1), axis=1)[:, None]
+        lt_median = np.nanmedian(x.reshape(12, -1), axis=1)[:, None]
+        # Only the candidate months are reduced, the others can be all NaN
+        month_mean = np.full(ws.shape, np.nan)
+        month_median = np.full(ws.shape, np.nan)
+        month_mean[candidate] = np.nanmean(x[candidate], axis=-1)
+        month_median[candidate] = np.nanmedian(x[candidate], axis=-1)
+        closeness += (np.abs(month_mean - lt_mean) + np.abs(month_median - lt_median)) / spread
+    closeness = np.where(candidate, closeness, np.inf)
+    chosen = np.argmin(closeness, axis=1)
+
+    selection = pd.DataFrame({
+        "Month": np.arange(1, 13),
+        "Year": years[chosen],
+        "Weighted FS": ws[np.arange(12), chosen],
+    }).set_index("Month")
+
+    # Stitch the selected months together in a nominal year
+    ts = hourly["timestamp"]
+    keep = (ts.dt.year.to_numpy() == selection["Year"].to_numpy()[ts.dt.month.to_numpy() - 1])
+    keep &= ~((ts.dt.month == 2) & (ts.dt.day == 29)).to_numpy()
+    tmy = hourly.loc[keep, WEATHER_COLUMNS].copy()
+    tmy_ts = ts[keep]
+    tmy.insert(0, "Local Time", pd.to_datetime(pd.DataFrame({
+        "year": TMY_YEAR,
+        "month": tmy_ts.dt.month,
+        "day": tmy_ts.dt.day,
+        "hour": tmy_ts.dt.hour,
+    })))
+    tmy["Source Year"] = tmy_ts.dt.year
+    tmy = tmy.sort_values("Local Time").reset_index(drop=True)
+
+    return tmy, selection
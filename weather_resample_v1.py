@@ -0,0 +1,124 @@
+"""
+
+This script contains the time-resolution stage applied to uploaded weather before the heating and cooling models
+
+Station exports are often 1-minute or 5-minute data, while the models and percentile summaries assume one row per hour.
+The cadence of "Local Time" is detected, the data is averaged to the target resolution, and every row gets an
+"Interval (h)" column so the percentile summaries weight each row by the time it represents.
+Gaps, duplicate timestamps and likely daylight saving time (DST) jumps are reported along the way.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+WEATHER_COLUMNS = ["Temperature (C)", "Relative Humidity (%)", "Solar Radiation (W/m²)"]
+GAP_FACTOR = 1.5        # A step longer than 1.5x the cadence is counted as a gap
+DST_HOURS = (0, 4)      # DST changes happen at night, between 00:00 and 04:00 local time
+
+RESOLUTION_OPTIONS = {
+    "1 hour": "1h",
+    "30 minutes": "30min",
+    "15 minutes": "15min",
+    "Keep original": None,
+}
+
+
+def detect_cadence(timestamps: pd.Series) -> pd.Timedelta:
+    """
+    Most common step between consecutive (sorted, unique) timestamps.
+    """
+    steps = pd.Series(np.sort(timestamps.dropna().unique())).diff().dropna()
+    steps = steps[steps > pd.Timedelta(0)]
+    if steps.empty:
+        return pd.Timedelta(hours=1)
+
+    return steps.mode().iloc[0]
+
+
+def weather_quality_report(timestamps: pd.Series, cadence: pd.Timedelta) -> dict:
+    """
+    Gaps, duplicates and likely DST anomalies in the raw timestamps.
+
+    A spring DST change shows up as a missing hour at night, an autumn change as a repeated hour at night.
+    """
+    ts = timestamps.dropna().sort_values().reset_index(drop=True)
+
+    # Duplicates: every repeat of an already seen timestamp
+    is_duplicate = ts.duplicated()
+    duplicates = ts[is_duplicate]
+
+    # Gaps: steps longer than the cadence allows
+    steps = ts.diff()
+    gap_rows = steps > cadence * GAP_FACTOR
+    gaps = pd.DataFrame({
+        "Gap Start": ts.shift(1)[gap_rows],
+        "Gap End": ts[gap_rows],
+    })
+    gaps["Missing Intervals"] = ((gaps["Gap End"] - gaps["Gap Start"]) / cadence).round().astype(int) - 1
+    gaps = gaps.reset_index(drop=True)
+
+    # DST: a missing hour or a repeated block of up to one hour, both at night
+    missing_one_hour = (gaps["Gap End"] - gaps["Gap Start"] - cadence) == pd.Timedelta(hours=1)
+    at_night = gaps["Gap Start"].dt.hour.between(*DST_HOURS)
+    spring = gaps.loc[missing_one_hour & at_night, "Gap Start"]
+
+    night_duplicates = duplicates[duplicates.dt.hour.between(*DST_HOURS)]
+    repeats_per_day = night_duplicates.groupby(night_duplicates.dt.date).size()
+    autumn = repeats_per_day[(repeats_per_day > 0) & (repeats_per_day * cadence <= pd.Timedelta(hours=1))]
+
+    dst = pd.concat([
+        pd.DataFrame({"Date": spring.dt.date, "Type": "Missing hour (DST start)"}),
+        pd.DataFrame({"Date": autumn.index, "Type": "Repeated hour (DST end)"}),
+    ], ignore_index=True)
+
+    return {
+        "cadence": cadence,
+        "rows": len(ts),
+        "duplicates": int(is_duplicate.sum()),
+        "gaps": gaps,
+        "dst_anomalies": dst,
+    }
+
+
+def _interval_hours(timestamps: pd.Series, cadence: pd.Timedelta) -> np.ndarray:
+    # Time until the next row, gaps are not credited to the row before them
+    to_next = timestamps.shift(-1) - timestamps
+    to_next = to_next.where(to_next <= cadence * GAP_FACTOR, cadence).fillna(cadence)
+    return (to_next / pd.Timedelta(hours=1)).to_numpy(dtype=float)
+
+
+def resample_weather(df: pd.DataFrame, target: str = "1h"):
+    """
+    Average the weather columns to the target resolution (pandas offset, e.g. "1h"), or keep the original
+    resolution if target is None or the data is already at least that coarse. Duplicate timestamps are averaged.
+
+    Returns (resampled DataFrame with "Local Time", "timestamp", the weather columns and "Interval (h)", report dict).
+    """
+    ts = pd.to_datetime(df["Local Time"])
+    cadence = detect_cadence(ts)
+    report = weather_quality_report(ts, cadence)
+
+    data = df[WEATHER_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    data.index = pd.DatetimeIndex(ts, name="timestamp")
+    data = data[data.index.notna()]
+
+    target_step = pd.Timedelta(target) if target is not None else None
+    if target_step is None or cadence >= target_step:
+        # Keep the native rows, only repeated timestamps are merged
+        out = data.groupby(level=0).mean()
+        interval_h = _interval_hours(out.index.to_series(), cadence)
+        report["target"] = cadence
+    else:
+        # Mean of each bin, empty bins (gaps) are dropped rather than filled
+        out = data.resample(target_step, label="left", closed="left").mean()
+        out = out.dropna(how="all")
+        interval_h = np.full(len(out), target_step / pd.Timedelta(hours=1))
+        report["target"] = target_step
+
+    out = out.reset_index()
+    out.insert(0, "Local Time", out["timestamp"])
+    out["Interval (h)"] = interval_h
+    report["rows_out"] = len(out)
+
+    return out, report